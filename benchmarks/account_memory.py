@@ -0,0 +1,73 @@
+"""Per-account memory of idle accounts: a full Client per wallet vs a compact AccountRecord,
+and what an AccountRecord still holds after its active() block has exited.
+
+    python -m benchmarks.account_memory --accounts 5000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account import Account  # noqa: E402
+
+from utils.client import Client, AccountRecord  # noqa: E402
+from utils.models import Proxy, RpcProviders  # noqa: E402
+from utils.providers import provider_pool  # noqa: E402
+
+
+def generate_accounts(count):
+    keys = ['0x' + os.urandom(32).hex() for _ in range(count)]
+    return [(key, Account.from_key(key).address, f'user{i}:pass@127.0.0.1:{10000 + i % 50000}')
+            for i, key in enumerate(keys)]
+
+
+def measure(build, accounts):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = build(accounts)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    pooled = len(provider_pool._web3s)
+    for client, _ in (held if build is build_clients else ()):
+        client.close()
+    del held
+    return size, pooled
+
+
+def build_clients(accounts):
+    return [(Client(key, proxy=Proxy(proxy).w3_proxy), Proxy(proxy)) for key, _, proxy in accounts]
+
+
+def build_records(accounts):
+    return [AccountRecord(key, address, proxy) for key, address, proxy in accounts]
+
+
+def build_finished_records(accounts):
+    records = [AccountRecord(key, address, proxy, RpcProviders.OPTIMISM.name) for key, address, proxy in accounts]
+    for record in records:
+        with record.active():
+            pass
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--accounts', type=int, default=5000)
+    args = parser.parse_args()
+
+    accounts = generate_accounts(args.accounts)
+    for name, build in (('Client + Proxy', build_clients), ('AccountRecord', build_records),
+                        ('after active()', build_finished_records)):
+        size, pooled = measure(build, accounts)
+        print(f'{name:>15}: {size / 1024 / 1024:8.2f} MB total, {size / len(accounts):8.0f} B per account, '
+              f'{pooled} pooled Web3s')
+
+
+if __name__ == '__main__':
+    main()
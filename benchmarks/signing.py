@@ -0,0 +1,69 @@
+"""Transaction signing: inline on the event loop vs the batched TransactionSigner (threads / processes).
+
+Reports wall time for a burst of concurrent signatures and the worst event-loop lag seen meanwhile.
+
+    python -m benchmarks.signing --transactions 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account import Account  # noqa: E402
+
+from utils.signer import TransactionSigner  # noqa: E402
+
+
+def build_transactions(count):
+    key = '0x' + os.urandom(32).hex()
+    to = Account.create().address
+    return [({'chainId': 10, 'nonce': nonce, 'gas': 21000, 'gasPrice': 10 ** 9, 'to': to, 'value': 1, 'data': b''},
+             key) for nonce in range(count)]
+
+
+async def watch_lag(stop: asyncio.Event, interval=0.001):
+    worst = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run_burst(sign, items):
+    stop = asyncio.Event()
+    lag = asyncio.create_task(watch_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(sign(transaction, key) for transaction, key in items))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await lag
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transactions', type=int, default=2000)
+    args = parser.parse_args()
+    items = build_transactions(args.transactions)
+
+    async def sign_inline(transaction, key):
+        return Account.sign_transaction(transaction, key).rawTransaction
+
+    thread_signer = TransactionSigner()
+    process_signer = TransactionSigner(use_processes=True, workers=os.cpu_count())
+    for name, sign in (('inline', sign_inline),
+                       ('signer threads', thread_signer.sign),
+                       ('signer processes', process_signer.sign)):
+        elapsed, lag = await run_burst(sign, items)
+        print(f'{name:>17}: {elapsed * 1000:9.1f} ms total, {elapsed / len(items) * 1e6:7.1f} us/tx, '
+              f'worst loop lag {lag * 1000:7.1f} ms')
+    thread_signer.close()
+    process_signer.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,6 +1,8 @@
+from datetime import datetime
+
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String
+from sqlalchemy import String, JSON, DateTime, UniqueConstraint
 from sqlalchemy import Integer
 
 
@@ -13,4 +15,19 @@ class BaseModel(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     address: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     private_key: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
-    proxy: Mapped[str] = mapped_column(String(255), nullable=True)
\ No newline at end of file
+    proxy: Mapped[str] = mapped_column(String(255), nullable=True)
+
+class JournalEntry(Base):
+    __tablename__ = "journal"
+    __table_args__ = (UniqueConstraint('run_id', 'address', 'action', 'step'),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    run_id: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    address: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    action: Mapped[str] = mapped_column(String(64), nullable=False)
+    step: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    tx_hash: Mapped[str] = mapped_column(String(66), nullable=True)
+    data: Mapped[dict] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -1,7 +1,59 @@
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from eth_account import Account
-from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from loguru import logger
+from sqlalchemy import select, func, event, text
+from utils.key_ops import address_from_key, import_keys
+from .base_models import JournalEntry
+
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 268435456,
+    'busy_timeout': 10000,
+    'temp_store': 'MEMORY',
+}
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {pragma}={value}')
+    cursor.close()
+
+
+def get_shared_engine(db_path):
+    """One engine, sessionmaker and writer lock per database file for the whole run"""
+    path = os.path.abspath(db_path)
+    if path not in get_shared_engine.engines:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False,
+                                     pool_size=4, max_overflow=4, pool_timeout=60)
+        event.listen(engine.sync_engine, 'connect', set_sqlite_pragmas)
+        get_shared_engine.engines[path] = (
+            engine,
+            sessionmaker(engine, class_=AsyncSession, expire_on_commit=False),
+            asyncio.Lock()
+        )
+    return get_shared_engine.engines[path]
+
+
+get_shared_engine.engines = {}
+
+
+async def dispose_engines():
+    engines = get_shared_engine.engines
+    get_shared_engine.engines = {}
+    for engine, _, _ in engines.values():
+        await engine.dispose()
+
 
 class DbManager:
     def __init__(self, db_path, base):
@@ -9,24 +61,29 @@ class DbManager:
         self.base = base
         self._engine = None
         self._sessionmaker = None
+        self._write_lock = None
         self.session = None
 
-    def get_engine(self):
+    def _bind_shared(self):
         if self._engine is None:
-            db_url = f"sqlite+aiosqlite:///{self.db_path}"
-            self._engine = create_async_engine(db_url, echo=False)
+            self._engine, self._sessionmaker, self._write_lock = get_shared_engine(self.db_path)
+
+    def get_engine(self):
+        self._bind_shared()
         return self._engine
 
     def get_sessionmaker(self):
-        if self._sessionmaker is None:
-            engine = self.get_engine()
-            self._sessionmaker = sessionmaker(
-                engine,
-                class_=AsyncSession,
-                expire_on_commit=False
-            )
+        self._bind_shared()
         return self._sessionmaker
 
+    @asynccontextmanager
+    async def write(self):
+        """Write transaction, writers of one file are serialized so tasks never hit 'database is locked'"""
+        self._bind_shared()
+        async with self._write_lock:
+            async with self.session.begin():
+                yield self.session
+
     async def __aenter__(self):
         session_factory = self.get_sessionmaker()
         self.session = session_factory()
@@ -39,13 +96,15 @@ class DbManager:
 
     async def create_tables(self):
         engine = self.get_engine()
-        async with engine.begin() as conn:
-            await conn.run_sync(self.base.metadata.create_all)
+        async with self._write_lock:
+            async with engine.begin() as conn:
+                await conn.run_sync(self.base.metadata.create_all)
 
     async def drop_tables(self):
         engine = self.get_engine()
-        async with engine.begin() as conn:
-            await conn.run_sync(self.base.metadata.drop_all)
+        async with self._write_lock:
+            async with engine.begin() as conn:
+                await conn.run_sync(self.base.metadata.drop_all)
 
     async def create_base_note(self, pk, proxy, **kwargs):
         result = await self.session.execute(
@@ -54,11 +113,97 @@ class DbManager:
         existing_note = result.scalar_one_or_none()
         if existing_note:
             return existing_note
-        note = self.base(address=Account.from_key(pk).address, private_key=pk, proxy=proxy, **kwargs)
+        note = self.base(address=address_from_key(pk), private_key=pk, proxy=proxy, **kwargs)
         self.session.add(note)
 
-    async def update_proxy_by_private_key(self, pk, new_proxy):
+    async def iter_accounts(self, page_size=500, shuffle=False):
+        """Yields pages of account rows as dicts, keyset paginated by id or in random order when shuffled"""
+        columns = (self.base.id, self.base.private_key, self.base.address, self.base.proxy)
+        if shuffle:
+            async with self.session.begin():
+                ids = list((await self.session.execute(select(self.base.id))).scalars())
+            random.shuffle(ids)
+            for i in range(0, len(ids), page_size):
+                chunk = ids[i:i + page_size]
+                async with self.session.begin():
+                    result = await self.session.execute(select(*columns).where(self.base.id.in_(chunk)))
+                    rows = {row['id']: dict(row) for row in result.mappings()}
+                yield [rows[row_id] for row_id in chunk if row_id in rows]
+            return
+        last_id = 0
+        while True:
+            async with self.session.begin():
+                result = await self.session.execute(
+                    select(*columns).where(self.base.id > last_id).order_by(self.base.id).limit(page_size)
+                )
+                rows = [dict(row) for row in result.mappings()]
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1]['id']
+
+    async def migrate_journal(self):
+        """Journals written before runs were tracked are dropped, they can not be told apart from a finished run"""
+        engine = self.get_engine()
+        async with self._write_lock, engine.begin() as conn:
+            columns = [row[1] for row in await conn.execute(text('PRAGMA table_info(journal)'))]
+            if columns and 'run_id' not in columns:
+                logger.warning('Journal of an older version found, it is dropped')
+                await conn.run_sync(JournalEntry.__table__.drop)
+                await conn.run_sync(JournalEntry.__table__.create)
+
+    async def get_last_run_id(self):
+        async with self.session.begin():
+            result = await self.session.execute(
+                select(JournalEntry.run_id).order_by(JournalEntry.id.desc()).limit(1)
+            )
+            return result.scalar_one_or_none()
+
+    async def get_journal(self, run_id, address, action):
         async with self.session.begin():
+            result = await self.session.execute(
+                select(JournalEntry).where(JournalEntry.run_id == run_id, JournalEntry.address == address,
+                                           JournalEntry.action == action)
+                # save_journal_step is a Core upsert, loaded entries must be refreshed from the row
+                .execution_options(populate_existing=True)
+            )
+            return {entry.step: entry for entry in result.scalars().all()}
+
+    async def save_journal_step(self, run_id, address, action, step, status, tx_hash=None, data=None):
+        now = datetime.now(timezone.utc)
+        stmt = insert(JournalEntry).values(run_id=run_id, address=address, action=action, step=step, status=status,
+                                           tx_hash=tx_hash, data=data, created_at=now, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['run_id', 'address', 'action', 'step'],
+            set_={'status': status,
+                  'tx_hash': func.coalesce(stmt.excluded.tx_hash, JournalEntry.tx_hash),
+                  'data': func.coalesce(stmt.excluded.data, JournalEntry.data),
+                  'updated_at': now}
+        )
+        async with self.write():
+            await self.session.execute(stmt)
+
+    async def insert_base_notes(self, chunks, total=None):
+        """Streams chunks of (pk, address, proxy) in with INSERT OR IGNORE in one transaction"""
+        stmt = self.base.__table__.insert().prefix_with('OR IGNORE')
+        imported = 0
+        async with self.write():
+            async for chunk in chunks:
+                await self.session.execute(stmt, [{'private_key': pk, 'address': address, 'proxy': proxy}
+                                                  for pk, address, proxy in chunk])
+                imported += len(chunk)
+                logger.info(f'Imported {imported}/{total or "?"} accounts')
+        return imported
+
+    async def bulk_create_base_notes(self, notes, chunk_size=2000, workers=None):
+        """Imports (pk, proxy) pairs, addresses are derived in worker processes, existing keys are kept as is"""
+        notes = list(notes)
+        if not notes:
+            return 0
+        return await import_keys(self, [pk for pk, _ in notes], [proxy for _, proxy in notes], chunk_size, workers)
+
+    async def update_proxy_by_private_key(self, pk, new_proxy):
+        async with self.write():
             result = await self.session.execute(
                 select(self.base).where(self.base.private_key == pk)
             )
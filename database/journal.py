@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def new_run_id() -> str:
+    return datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+
+
+class AccountJournal:
+    """Per run x account x action record of finished and in-flight steps.
+    A new run starts with an empty journal, a resumed run reuses the run_id of the crashed one"""
+
+    def __init__(self, db_manager, run_id: str, address: str, action: str):
+        self.db_manager = db_manager
+        self.run_id = run_id
+        self.address = address
+        self.action = action
+        self.entries = {}
+
+    async def load(self):
+        self.entries = await self.db_manager.get_journal(self.run_id, self.address, self.action)
+        return self
+
+    def get(self, step: str):
+        return self.entries.get(step)
+
+    def is_done(self, step: str) -> bool:
+        entry = self.entries.get(step)
+        return entry is not None and entry.status == DONE
+
+    def in_flight(self, step: str):
+        """Entry of a step that was sent but never confirmed"""
+        entry = self.entries.get(step)
+        if entry is not None and entry.status == IN_FLIGHT:
+            return entry
+
+    async def mark(self, step: str, status: str, tx_hash: str | None = None, data: dict | None = None):
+        await self.db_manager.save_journal_step(self.run_id, self.address, self.action, step, status, tx_hash, data)
+        self.entries = await self.db_manager.get_journal(self.run_id, self.address, self.action)
+
+    async def reattach(self, client, step: str, timeout: float = 120) -> bool | None:
+        """Waits for the in-flight tx of a step.
+        True - mined successfully, False - reverted or dropped (safe to send again), None - still pending"""
+        entry = self.in_flight(step)
+        if entry is None or not entry.tx_hash:
+            return False
+        try:
+            receipt = await client.wait_for_receipt(entry.tx_hash, timeout=timeout)
+        except TimeExhausted:
+            try:
+                await client.w3.eth.get_transaction(entry.tx_hash)
+            except TransactionNotFound:
+                await self.mark(step, FAILED)
+                return False
+            return None
+        if receipt['status'] == 1:
+            await self.mark(step, DONE)
+            return True
+        await self.mark(step, FAILED)
+        return False
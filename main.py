@@ -1,4 +1,5 @@
 import asyncio
+import multiprocessing
 import sys
 from utils.router import Router
 import colorama
@@ -31,4 +32,5 @@ async def run():
     await router.route()
     
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     asyncio.run(run())
@@ -1,7 +1,7 @@
 CEX_WITHDRAWAL_RPCS = {
-    "Arbitrum": "https://arb1.lava.build",
-    "Optimism": "https://optimism.lava.build",
-    "Base": "https://base.lava.build",
+    "Arbitrum": ["https://arb1.lava.build", "https://arb1.arbitrum.io/rpc"],
+    "Optimism": ["https://optimism.lava.build", "https://mainnet.optimism.io"],
+    "Base": ["https://base.lava.build", "https://mainnet.base.org"],
 }
 
 NETWORK_MAPPINGS = {
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import ccxt.async_support as ccxt
+from loguru import logger
+
+from .cex_info import SUPPORTED_EXCHANGES
+from .withdraw_scheduler import WithdrawalScheduler
+
+
+class SharedExchange:
+    """One authenticated ccxt exchange per run with currency data cached under a TTL"""
+
+    def __init__(self, config, ttl: float = 600):
+        exchange_name = config.EXCHANGES.name.lower()
+        if exchange_name not in SUPPORTED_EXCHANGES:
+            raise ValueError(f"Unsupported exchange: {exchange_name}")
+        self.exchange = getattr(ccxt, exchange_name)()
+        self.exchange.apiKey = config.EXCHANGES.apiKey
+        self.exchange.secret = config.EXCHANGES.secretKey
+        if config.EXCHANGES.passphrase:
+            self.exchange.password = config.EXCHANGES.passphrase
+        self.scheduler = WithdrawalScheduler(self.exchange,
+                                             rate=config.EXCHANGES.withdraw_rate_limit,
+                                             burst=max(int(config.EXCHANGES.withdraw_rate_limit), 1),
+                                             network_concurrency=config.EXCHANGES.network_concurrency)
+        self.ttl = ttl
+        self.authenticated = False
+        self.updated_at = 0
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+
+    async def authenticate(self):
+        async with self._lock:
+            if not self.authenticated:
+                await self.exchange.fetch_currencies()
+                self.authenticated = True
+
+    async def refresh(self):
+        await self.exchange.load_markets(reload=True)
+        self.updated_at = time.monotonic()
+
+    async def get_currencies(self) -> dict:
+        if not self.updated_at:
+            async with self._lock:
+                if not self.updated_at:
+                    await self.refresh()
+        elif time.monotonic() - self.updated_at > self.ttl and (self._refresh_task is None
+                                                                 or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+        return self.exchange.currencies
+
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f'Exchange currencies refresh failed, keeping cached data: {type(e).__name__}: {e}')
+
+    async def close(self):
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        await self.exchange.close()
+
+
+def get_shared_exchange(config) -> SharedExchange:
+    if not hasattr(get_shared_exchange, "_exchange"):
+        get_shared_exchange._exchange = SharedExchange(config)
+    return get_shared_exchange._exchange
+
+
+async def close_shared_exchange():
+    if hasattr(get_shared_exchange, "_exchange"):
+        await get_shared_exchange._exchange.close()
+        del get_shared_exchange._exchange
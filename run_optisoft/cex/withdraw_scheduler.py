@@ -0,0 +1,67 @@
+import asyncio
+import random
+import time
+
+import ccxt.async_support as ccxt
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class WithdrawalScheduler:
+    """Queues exchange withdrawals behind a token bucket and per-network concurrency limits"""
+
+    def __init__(self, exchange, rate: float = 6, burst: int = 6, network_concurrency: int = 2,
+                 max_backoff: float = 60, max_throttled_attempts: int = 10):
+        self.exchange = exchange
+        self.bucket = TokenBucket(rate, burst)
+        self.network_concurrency = network_concurrency
+        self.max_backoff = max_backoff
+        self.max_throttled_attempts = max_throttled_attempts
+        self._network_semaphores = {}
+        self._paused_until = 0
+        self._backoff = 1
+
+    async def _wait_pause(self):
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def _throttled(self):
+        delay = self._backoff * random.uniform(1, 1.5)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._backoff = min(self._backoff * 2, self.max_backoff)
+
+    async def submit(self, currency: str, amount: float, address: str, params: dict, network: str | None = None):
+        semaphore = self._network_semaphores.setdefault(network, asyncio.Semaphore(self.network_concurrency))
+        async with semaphore:
+            attempts = 0
+            while True:
+                await self._wait_pause()
+                await self.bucket.acquire()
+                try:
+                    withdrawal = await self.exchange.withdraw(currency, amount, address, params=params)
+                except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+                    attempts += 1
+                    if attempts >= self.max_throttled_attempts:
+                        raise
+                    self._throttled()
+                    continue
+                self._backoff = 1
+                return withdrawal
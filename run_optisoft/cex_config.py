@@ -22,6 +22,8 @@ class ExchangesConfig:
     secretKey: str
     passphrase: str
     withdrawals: List[WithdrawalConfig]
+    withdraw_rate_limit: float = 6
+    network_concurrency: int = 2
 
 @dataclass
 class Config:
@@ -36,6 +38,8 @@ class Config:
                 apiKey=data["EXCHANGES"]["apiKey"],
                 secretKey=data["EXCHANGES"]["secretKey"],
                 passphrase=data["EXCHANGES"]["passphrase"],
+                withdraw_rate_limit=data["EXCHANGES"].get("withdraw_rate_limit", 6),
+                network_concurrency=data["EXCHANGES"].get("network_concurrency", 2),
                 withdrawals=[
                     WithdrawalConfig(
                         currency=w["currency"],
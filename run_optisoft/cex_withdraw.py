@@ -1,43 +1,37 @@
 import random
 import ccxt.async_support as ccxt
 import asyncio
-from eth_account import Account
-from web3 import Web3
 from .cex.cex_info import (
     NETWORK_MAPPINGS,
     EXCHANGE_PARAMS,
-    SUPPORTED_EXCHANGES,
     CEX_WITHDRAWAL_RPCS
 )
 from .cex_config import Config
+from .cex.exchange_client import get_shared_exchange
 from utils.utils import Logger
+from utils.providers import provider_pool
+from utils.rpc_pool import rpc_pools
+from utils.block_scanner import block_scanners
+from database.journal import IN_FLIGHT, DONE, FAILED
 from typing import Dict
 
 class CexWithdraw(Logger):
-    def __init__(self, account_index: int, private_key: str, config: Config, session, client, db_manager=None):
+    def __init__(self, account_index: int, private_key: str, config: Config, session, client, db_manager=None,
+                 journal=None, limiter=None):
         self.account_index = account_index
         self.private_key = private_key
         self.config = config
         self.session = session
         self.client = client
         self.db_manager = db_manager
+        self.journal = journal
+        self.limiter = limiter
         
-        # Setup exchange based on config
-        exchange_name = config.EXCHANGES.name.lower()
-        if exchange_name not in SUPPORTED_EXCHANGES:
-            raise ValueError(f"Unsupported exchange: {exchange_name}")
-            
-        # Initialize exchange
-        self.exchange = getattr(ccxt, exchange_name)()
-            
-        # Setup exchange credentials
-        self.exchange.apiKey = config.EXCHANGES.apiKey
-        self.exchange.secret = config.EXCHANGES.secretKey
-        if config.EXCHANGES.passphrase:
-            self.exchange.password = config.EXCHANGES.passphrase
+        # Exchange client is shared by every account in the run
+        self.shared_exchange = get_shared_exchange(config)
+        self.exchange = self.shared_exchange.exchange
         
-        self.account = Account.from_key(private_key)
-        self.address = self.account.address
+        self.address = self.client.address
         
         # Initialize Logger without account_index in messages
         super().__init__(self.client.address, additional={
@@ -56,6 +50,7 @@ class CexWithdraw(Logger):
         # Web3 will be initialized later in withdraw()
         self.web3 = None
         self.network = None
+        self.chain = None
 
     async def __aenter__(self):
         """Async context manager entry"""
@@ -63,22 +58,22 @@ class CexWithdraw(Logger):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        await self.exchange.close()
+        """Async context manager exit. The shared exchange is closed when the run ends"""
+        if self.web3 is not None:
+            provider_pool.release_web3(self.web3)
+            self.web3 = None
 
     async def check_auth(self) -> None:
         """Test exchange authentication"""
         self.logger.info("Testing exchange authentication...")
         try:
-            await self.exchange.fetch_currencies()
+            await self.shared_exchange.authenticate()
             self.logger.success("Authentication successful")
         except ccxt.AuthenticationError as e:
             self.logger.error(f"Authentication error: {str(e)}")
-            await self.exchange.close()
             raise
         except Exception as e:
             self.logger.error(f"Unexpected error during authentication: {str(e)}")
-            await self.exchange.close()
             raise
             
     async def get_chains_info(self) -> Dict:
@@ -86,17 +81,17 @@ class CexWithdraw(Logger):
         self.logger.info("Getting withdrawal networks data...")
         
         try:
-            await self.exchange.load_markets()
+            currencies = await self.shared_exchange.get_currencies()
             
             chains_info = {}
             withdrawal_config = self.config.EXCHANGES.withdrawals[0]
             currency = withdrawal_config.currency.upper()
             
-            if currency not in self.exchange.currencies:
+            if currency not in currencies:
                 self.logger.error(f"Currency {currency} not found on {self.config.EXCHANGES.name}")
                 return {}
                 
-            networks = self.exchange.currencies[currency]["networks"]
+            networks = currencies[currency]["networks"]
             
             for key, info in networks.items():
                 withdraw_fee = info["fee"]
@@ -118,38 +113,80 @@ class CexWithdraw(Logger):
             return chains_info
         except Exception as e:
             self.logger.error(f"Error getting chains info: {str(e)}")
-            await self.exchange.close()
             raise
 
-    async def wait_for_transaction(self, initial_balance: int, timeout: int = 600) -> str:
-        """Wait for funds to arrive and return the transaction hash"""
+    async def wait_for_transaction(self, initial_balance: int, timeout: int = 600, from_block: int = None) -> str:
+        """Wait for funds to arrive and return the transaction hash.
+        The account's limiter slot is given back meanwhile, so other wallets run while this one only waits"""
+        if self.limiter is None:
+            return await self._wait_for_transaction(initial_balance, timeout, from_block)
+        async with self.limiter.released():
+            return await self._wait_for_transaction(initial_balance, timeout, from_block)
+
+    async def _wait_for_transaction(self, initial_balance: int, timeout: int = 600, from_block: int = None) -> str:
         start_time = asyncio.get_event_loop().time()
         self.logger.info(f"Waiting for funds to arrive. Initial balance: {self.web3.from_wei(initial_balance, 'ether')} ETH")
         
-        while (asyncio.get_event_loop().time() - start_time) < timeout:
-            try:
-                current_balance = self.web3.eth.get_balance(self.address)
-                if current_balance > initial_balance:
-                    # Funds arrived; find the transaction hash
-                    latest_block = self.web3.eth.block_number
-                    for block_num in range(latest_block, max(latest_block - 10, 0), -1):  # Check last 10 blocks
-                        block = self.web3.eth.get_block(block_num, full_transactions=True)
-                        for tx in block.transactions:
-                            if tx['to'] == self.address and tx['value'] > 0:
-                                tx_hash = tx['hash'].hex()
-                                self.logger.success(f"Funds received! Transaction hash: {tx_hash}")
-                                return tx_hash
-                    self.logger.success("Funds received, but transaction hash not found in recent blocks")
-                    return "Unknown (funds confirmed)"
-                self.logger.info(f"Current balance: {self.web3.from_wei(current_balance, 'ether')} ETH. Waiting...")
-                await asyncio.sleep(10)
-            except Exception as e:
-                self.logger.error(f"Error checking balance: {str(e)}")
-                await asyncio.sleep(5)
+        # Incoming transfers are matched by the shared per-chain scanner; the balance check
+        # catches deposits that arrive as internal transactions
+        scanner = block_scanners.get(self.chain)
+        deposit = scanner.watch(self.address, from_block)
+        try:
+            while (remaining := timeout - (asyncio.get_event_loop().time() - start_time)) > 0:
+                try:
+                    tx_hash = await asyncio.wait_for(asyncio.shield(deposit), min(30, remaining))
+                    self.logger.success(f"Funds received! Transaction hash: {tx_hash}")
+                    return tx_hash
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    current_balance = await self.web3.eth.get_balance(self.address)
+                    if current_balance > initial_balance:
+                        self.logger.success("Funds received, but transaction hash not found in scanned blocks")
+                        return "Unknown (funds confirmed)"
+                    self.logger.info(f"Current balance: {self.web3.from_wei(current_balance, 'ether')} ETH. Waiting...")
+                except Exception as e:
+                    self.logger.error(f"Error checking balance: {str(e)}")
+        finally:
+            scanner.unwatch(self.address)
                 
         self.logger.warning(f"Timeout reached after {timeout} seconds. Funds not received.")
         return None
 
+    def connect_network(self, network: str):
+        self.network = network
+        self.chain = network.upper()
+        rpc_pools.register(self.chain, CEX_WITHDRAWAL_RPCS[network])
+        previous, self.web3 = self.web3, provider_pool.acquire_web3(self.chain, self.client.proxy, self.client.headers)
+        if previous is not None:
+            provider_pool.release_web3(previous)
+
+    async def journal_withdrawn(self, tx_hash: str):
+        if self.journal:
+            await self.journal.mark('withdrawn', DONE, tx_hash=tx_hash if tx_hash.startswith('0x') else None)
+
+    async def resume(self, timeout: int) -> bool | None:
+        """Result of a withdrawal journaled before a restart, None if a new withdrawal has to be made"""
+        if not self.journal:
+            return None
+        if self.journal.is_done('withdrawn'):
+            self.logger.info("Withdrawal is already done in this run. Skipping...")
+            return True
+        entry = self.journal.in_flight('withdrawn')
+        if not entry or not entry.data:
+            return None
+        # The exchange already accepted this withdrawal, wait for it instead of withdrawing twice
+        self.logger.info(f"Re-attaching to withdrawal made before restart: {entry.data.get('withdrawal_id')}")
+        self.connect_network(entry.data['network'])
+        tx_hash = await self.wait_for_transaction(entry.data['initial_balance'], timeout=timeout,
+                                                  from_block=entry.data['from_block'])
+        if tx_hash:
+            await self.journal_withdrawn(tx_hash)
+            return True
+        await self.journal.mark('withdrawn', FAILED)
+        self.logger.error("Withdrawal made before restart did not arrive. It will be retried in the next run")
+        return False
+
     async def withdraw(self) -> bool:
         """
         Withdraw from exchange to the specified address with retries and log transaction hash.
@@ -162,6 +199,10 @@ class CexWithdraw(Logger):
             withdrawal_config = self.config.EXCHANGES.withdrawals[0]
             if not withdrawal_config.networks:
                 raise ValueError("No networks specified in withdrawal configuration")
+
+            resumed = await self.resume(withdrawal_config.max_wait_time)
+            if resumed is not None:
+                return resumed
                 
             # Get chains info
             chains_info = await self.get_chains_info()
@@ -193,12 +234,11 @@ class CexWithdraw(Logger):
             self.logger.info(f"Selected network for withdrawal: {network} ({exchange_network})")
             
             # Initialize Web3 for the selected network
-            rpc_url = CEX_WITHDRAWAL_RPCS.get(network)
-            if not rpc_url:
+            rpc_urls = CEX_WITHDRAWAL_RPCS.get(network)
+            if not rpc_urls:
                 self.logger.error(f"No RPC URL found for network: {network}")
                 return False
-            self.network = network
-            self.web3 = Web3(Web3.HTTPProvider(rpc_url))
+            self.connect_network(network)
             
             # Set withdrawal amount
             min_amount = max(withdrawal_config.min_amount, network_info["withdrawMin"])
@@ -219,7 +259,10 @@ class CexWithdraw(Logger):
                     self.logger.info(f"Withdrawing {amount} {currency} to {self.address}")
                     
                     # Get initial balance before withdrawal
-                    initial_balance = self.web3.eth.get_balance(self.address)
+                    initial_balance, from_block = await asyncio.gather(
+                        self.web3.eth.get_balance(self.address),
+                        self.web3.eth.block_number
+                    )
                     
                     # Get exchange-specific withdrawal parameters
                     params = {
@@ -229,20 +272,30 @@ class CexWithdraw(Logger):
                     }
                     
                     # Execute the withdrawal
-                    withdrawal = await self.exchange.withdraw(
+                    withdrawal = await self.shared_exchange.scheduler.submit(
                         currency,
                         amount,
                         self.address,
-                        params=params
+                        params,
+                        network=exchange_network
                     )
                     
                     self.logger.success(f"Withdrawal initiated successfully: {withdrawal}")
+                    if self.journal:
+                        await self.journal.mark('withdrawn', IN_FLIGHT, data={
+                            'network': network,
+                            'withdrawal_id': withdrawal.get('id') if isinstance(withdrawal, dict) else None,
+                            'initial_balance': initial_balance,
+                            'from_block': from_block
+                        })
                     
                     # Wait for funds and log transaction hash
-                    tx_hash = await self.wait_for_transaction(initial_balance, timeout=withdrawal_config.max_wait_time)
+                    tx_hash = await self.wait_for_transaction(initial_balance,
+                                                              timeout=withdrawal_config.max_wait_time,
+                                                              from_block=from_block)
                     if tx_hash:
                         self.logger.success(f"Transaction confirmed with hash: {tx_hash}")
-                        await self.exchange.close()
+                        await self.journal_withdrawn(tx_hash)
                         return True
                     else:
                         self.logger.warning("Funds not received within timeout, retrying if attempts remain")
@@ -250,38 +303,31 @@ class CexWithdraw(Logger):
                 except ccxt.NetworkError as e:
                     if attempt == max_retries - 1:
                         self.logger.error(f"Network error on final attempt: {str(e)}")
-                        await self.exchange.close()
                         return False
                     self.logger.warning(f"Network error, retrying: {str(e)}")
-                    await asyncio.sleep(5)
+                    await asyncio.sleep(5 * 2 ** attempt)
                     
                 except ccxt.ExchangeError as e:
                     error_msg = str(e).lower()
                     if "insufficient balance" in error_msg:
                         self.logger.error("Insufficient balance in exchange account")
-                        await self.exchange.close()
                         return False
                     if "whitelist" in error_msg or "not in withdraw whitelist" in error_msg:
                         self.logger.error(f"Address not in whitelist: {str(e)}")
-                        await self.exchange.close()
                         return False
                     if attempt == max_retries - 1:
                         self.logger.error(f"Exchange error on final attempt: {str(e)}")
-                        await self.exchange.close()
                         return False
                     self.logger.warning(f"Exchange error, retrying: {str(e)}")
-                    await asyncio.sleep(5)
+                    await asyncio.sleep(5 * 2 ** attempt)
                     
                 except Exception as e:
                     self.logger.error(f"Unexpected error during withdrawal: {str(e)}")
-                    await self.exchange.close()
                     return False
                     
             self.logger.error(f"Withdrawal failed after {max_retries} attempts")
-            await self.exchange.close()
             return False
             
         except Exception as e:
             self.logger.error(f"Fatal error during withdrawal process: {str(e)}")
-            await self.exchange.close()
             return False
\ No newline at end of file
@@ -1,19 +1,26 @@
+import asyncio
 import random
+import time
 from web3 import Web3
-from utils.utils import read_json
+from utils.abi_registry import abi_registry
 from utils.models import ChainExplorers
+from utils.metrics import TX_PHASE, TX_RESULTS
+from database.journal import IN_FLIGHT, DONE, FAILED
 from ..config import CONFIG
 from ..paths import UNICHAIN_BRIDGE_ABI
 
 
 class UnichainBridge:
-    def __init__(self, client, logger, db_manager, session):
+    def __init__(self, client, logger, db_manager, session, journal=None):
         self.client = client
         self.session = session
         self.db_manager = db_manager
-        self.contract = self.client.w3.eth.contract(
-            address='0xe8CDF27AcD73a434D661C84887215F7598e7d0d3', 
-            abi=read_json(UNICHAIN_BRIDGE_ABI)
+        self.journal = journal
+        self.contract = abi_registry.contract(
+            self.client.w3,
+            '0xe8CDF27AcD73a434D661C84887215F7598e7d0d3',
+            UNICHAIN_BRIDGE_ABI,
+            functions=('quoteSend', 'send')
         )
         self.logger = logger
         self.explorer = ChainExplorers.OPTIMISM.value
@@ -43,38 +50,56 @@ class UnichainBridge:
                 b''
             )
 
-            native_fee, lz_token_fee = await self.quote_send_fee(send_param)
+            (native_fee, lz_token_fee), balance_eth = await asyncio.gather(
+                self.quote_send_fee(send_param),
+                self.get_balance()
+            )
             total_value = amount_wei + native_fee
 
-            balance_eth = await self.get_balance()
             if balance_eth < self.client.w3.from_wei(total_value, 'ether'):
                 self.logger.error("Insufficient ETH balance for bridging!")
                 return False, None
 
             self.logger.info(f"Bridging {amount_eth:.7f} ETH from Optimism to Unichain...")
-            transaction = await self.contract.functions.send(
-                send_param,
-                (native_fee, lz_token_fee),
-                self.client.address
-            ).build_transaction({
-                'chainId': await self.client.w3.eth.chain_id,
-                'from': self.client.address,
-                'value': total_value,
-                'gasPrice': int(await self.client.w3.eth.gas_price * 1.1),
-                'nonce': await self.client.w3.eth.get_transaction_count(self.client.address),
-            })
-
-            transaction['gas'] = await self.client.w3.eth.estimate_gas(transaction)
+            build_started = time.monotonic()
+            chain_id, gas_price = await asyncio.gather(
+                self.client.get_chain_id(),
+                self.client.get_gas_price()
+            )
+            async with self.client.nonce_manager.reserve() as nonce:
+                transaction = await self.contract.functions.send(
+                    send_param,
+                    (native_fee, lz_token_fee),
+                    self.client.address
+                ).build_transaction({
+                    'chainId': chain_id,
+                    'from': self.client.address,
+                    'value': total_value,
+                    'gasPrice': int(gas_price * 1.1),
+                    'nonce': nonce,
+                })
+                TX_PHASE.observe(time.monotonic() - build_started, flow='bridge', phase='build')
 
-            signed_txn = self.client.w3.eth.account.sign_transaction(transaction, self.client.key)
-            tx_hash = await self.client.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+                with TX_PHASE.time(flow='bridge', phase='sign'):
+                    raw_transaction = await self.client.sign_transaction(transaction)
+                with TX_PHASE.time(flow='bridge', phase='send'):
+                    tx_hash = await self.client.w3.eth.send_raw_transaction(raw_transaction)
             self.logger.info(f"Bridge transaction sent: {self.explorer}{tx_hash.hex()}")
+            if self.journal:
+                await self.journal.mark('bridged', IN_FLIGHT, tx_hash=tx_hash.hex())
 
-            receipt = await self.client.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+            with TX_PHASE.time(flow='bridge', phase='confirm'):
+                receipt = await self.client.wait_for_receipt(tx_hash, timeout=120)
             if receipt['status'] == 1:
+                TX_RESULTS.inc(flow='bridge', status='success')
+                if self.journal:
+                    await self.journal.mark('bridged', DONE)
                 self.logger.info("Bridge transaction confirmed successfully!")
                 return True, tx_hash.hex()
             else:
+                TX_RESULTS.inc(flow='bridge', status='reverted')
+                if self.journal:
+                    await self.journal.mark('bridged', FAILED)
                 self.logger.error("Bridge transaction failed on-chain!")
                 return False, tx_hash.hex()
 
@@ -82,8 +107,29 @@ class UnichainBridge:
             self.logger.error(f"Bridge failed: {e}")
             return False, None
 
+    async def resume(self):
+        """True if the bridge is already done, False if it has to be sent, None if a previous tx is still pending"""
+        if not self.journal:
+            return False
+        if self.journal.is_done('bridged'):
+            self.logger.info("Bridge is already done in this run. Skipping...")
+            return True
+        entry = self.journal.in_flight('bridged')
+        if not entry:
+            return False
+        self.logger.info(f"Re-attaching to bridge transaction sent before restart: {self.explorer}{entry.tx_hash}")
+        status = await self.journal.reattach(self.client, 'bridged')
+        if status is None:
+            self.logger.warning("Previous bridge transaction is still pending. Not sending a new one")
+        elif not status:
+            self.logger.warning("Previous bridge transaction failed or was dropped. Sending a new one...")
+        return status
+
     async def run(self):
         try:
+            resumed = await self.resume()
+            if resumed is not False:
+                return bool(resumed)
             random_bridge_amount = round(random.uniform(*CONFIG.UNICHAIN_BRIDGE.BRIDGE_AMOUNT), 7)
             self.logger.info(f"Preparing to bridge {random_bridge_amount:.7f} ETH...")
             status, tx_hash = await self.bridge(random_bridge_amount)
@@ -92,5 +138,7 @@ class UnichainBridge:
                 self.logger.success(f"Bridge successful: {self.explorer}{tx_hash}")
             else:
                 self.logger.error("Bridge failed!")
+            return status
         except Exception as e:
             self.logger.error(f"Run failed: {e}")
+            return False
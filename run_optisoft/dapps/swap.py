@@ -1,5 +1,6 @@
 from decimal import Decimal
-from utils.utils import approve_asset, asset_balance, generate_simple_abi, read_json, approve_if_insufficient_allowance
+from utils.utils import approve_asset, asset_balance, asset_balances, generate_simple_abi, approve_if_insufficient_allowance
+from utils.abi_registry import abi_registry
 from utils.models import ChainExplorers, RpcProviders
 from .constants import UNISWAP_CONTRACT, UNISWAP_TOKENS, PERMIT_CONTRACT, VELODROME_CONTRACT
 from ..config import CONFIG
@@ -18,19 +19,14 @@ class Uniswap:
         
 
     async def check_balance(self):
-        self.contract = self.client.w3.eth.contract(
-            address=VELODROME_CONTRACT, abi=read_json(UNISWAP_ROUTER_ABI)
-        )
+        self.contract = abi_registry.contract(self.client.w3, VELODROME_CONTRACT, UNISWAP_ROUTER_ABI)
         
-        self.permit_contract = self.client.w3.eth.contract(
-            address=PERMIT_CONTRACT, abi=read_json(PERMIT_ABI)
-        )
+        self.permit_contract = abi_registry.contract(self.client.w3, PERMIT_CONTRACT, PERMIT_ABI)
         
-        balance = await asset_balance(self, UNISWAP_TOKENS["USDT0"]["address"])
-        balance_in_eth = self.client.w3.from_wei(balance, 'ether')
+        balances = await asset_balances(self, ['eth', UNISWAP_TOKENS["USDT0"]["address"]])
+        balance_in_eth = self.client.w3.from_wei(balances[UNISWAP_TOKENS["USDT0"]["address"]], 'ether')
         
-        demo = await self.client.w3.eth.get_balance(self.client.address)
-        balance_of_eth = self.client.w3.from_wei(demo, 'ether')
+        balance_of_eth = self.client.w3.from_wei(balances['eth'], 'ether')
         
         self.logger.info(f"Balance of USDT is: {balance_in_eth} and ETH is: {balance_of_eth}")
         return balance_of_eth
@@ -40,26 +36,21 @@ class Uniswap:
         self.logger.info("Calculating amount to swap. Please, wait some time.")
         
         percentage = random.randint(*CONFIG.UNISWAP.SWAP_AMOUNT_PERCENTAGE)
-        self.logger.debug(percentage)
-
         balance_wei = self.client.w3.to_wei(balance_of_eth, 'ether')
-        self.logger.debug(balance_wei)
-        
         balance_wei_percentage = (balance_wei * percentage) // 100
-        self.logger.debug(balance_wei_percentage)
-        
-        balance_ether_percentage = self.client.w3.from_wei(balance_wei_percentage, 'ether')
-        self.logger.debug(balance_ether_percentage)
-        
         balance_wei_reduced = (balance_wei_percentage * 95) // 100
-        self.logger.debug(balance_wei_reduced)
+        # lazy so the conversions are skipped entirely when DEBUG is gated off
+        self.logger.opt(lazy=True).debug(
+            "percentage: {} | balance: {} wei | {}% of balance: {} wei ({} ETH) | reduced: {} wei",
+            lambda: percentage, lambda: balance_wei, lambda: percentage, lambda: balance_wei_percentage,
+            lambda: self.client.w3.from_wei(balance_wei_percentage, 'ether'), lambda: balance_wei_reduced)
                 
         self.logger.info(f"Getting started to swap: {self.client.w3.from_wei(balance_wei_reduced, 'ether')} ETH and {balance_wei_percentage}")
         return balance_wei_reduced
         
         
     async def run(self):
-        self.client.define_new_provider(RpcProviders.UNICHAIN.value, 130)
+        self.client.define_new_provider(RpcProviders.UNICHAIN, 130)
         # await self.amount_to_swap(await self.check_balance())
         await self.prepare_data(await self.amount_to_swap(await self.check_balance()))
         
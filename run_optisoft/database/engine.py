@@ -1,8 +1,7 @@
 from sqlalchemy.sql.functions import user
 from database.engine import DbManager
-from sqlalchemy import select
-from utils.client import Client
-from utils.models import Proxy
+from sqlalchemy import update, bindparam
+from web3 import Web3
 from loguru import logger
 from sqlalchemy.sql import text
 from sqlalchemy.exc import SQLAlchemyError
@@ -15,21 +14,32 @@ class OPDbManager(DbManager):
     async def create_base_note(self, pk, proxy):
         await super().create_base_note(pk, proxy)
 
-    async def get_run_data(self):
-        async with self.session.begin():
-            result = await self.session.execute(select(self.base))
-            users = result.scalars().all()
-            return [{'client': Client(user.private_key), 'proxy': Proxy(user.proxy)}
-                    for user in users]
-            
+    async def save_preflight(self, report):
+        table = self.base.__table__
+        stmt = (update(table)
+                .where(table.c.private_key == bindparam('b_private_key'))
+                .values(op_balance=bindparam('b_op_balance'),
+                        proxy=bindparam('b_proxy'),
+                        proxy_status=bindparam('b_proxy_status')))
+        rows = [{'b_private_key': pk,
+                 'b_op_balance': float(Web3.from_wei(values['balance'], 'ether'))
+                 if values['balance'] is not None else None,
+                 'b_proxy': values['proxy'],
+                 'b_proxy_status': values['proxy_status']}
+                for pk, values in report.items()]
+        if not rows:
+            return
+        async with self.write():
+            await self.session.execute(stmt, rows)
+
     async def add_extra_columns(self, table_name="op_base"):
         try:
             engine = self.get_engine()
-            async with engine.begin() as conn:
+            async with self._write_lock, engine.begin() as conn:
                 result = await conn.execute(text(f"PRAGMA table_info({table_name})"))
                 existing_columns = [row[1] for row in result]
 
-                columns_to_add = {}
+                columns_to_add = {'proxy_status': 'VARCHAR(16)'}
 
                 for column, column_type in columns_to_add.items():
                     if column not in existing_columns:
@@ -14,3 +14,4 @@ class OPBaseModel(BaseModel):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     op_balance: Mapped[float] = mapped_column(Float, nullable=True)
+    proxy_status: Mapped[str] = mapped_column(String(16), nullable=True)
@@ -1,79 +1,122 @@
-import asyncio
+import time
+
+from web3 import Web3
 
 from .router import OPRouter
 from utils.runner import ModernRunner
+from utils.concurrency import AdaptiveLimiter
+from utils.providers import provider_pool
+from utils.metrics import metrics, LIMITER_WAIT, TASK_DURATION
 from utils.models import RpcProviders
-from utils.utils import get_session, sleep, get_data_lines, get_new_db_path_name, build_db_path
+from utils.utils import get_session, sleep, get_data_lines, get_new_db_path_name, build_db_path, build_logs_path
 from .task import Task
+from database.journal import AccountJournal, new_run_id
+from loguru import logger
 from .database.engine import OPDbManager
 from .database.models import OPBaseModel
 from .config import CONFIG
+from utils.utils import setup_logging
 import os
-from loguru import logger
-import traceback
-import random
 from .utils import show_mon_balance
+from .cex.exchange_client import close_shared_exchange
 
 
 class OPRunner(ModernRunner):
+    CHAIN = RpcProviders.OPTIMISM.name
+    PREFLIGHT_CHAIN = RpcProviders.OPTIMISM.name
+    SHUFFLE_ACCOUNTS = True
+
     def __init__(self):
+        setup_logging(level=getattr(CONFIG.SETTINGS, 'LOG_LEVEL', 'INFO'),
+                      json_logs=getattr(CONFIG.SETTINGS, 'LOG_JSON', False))
         self.Router = OPRouter
+        self.run_id = None
         super().__init__()
 
     async def run_task(self, data):
-        semaphore = self.global_data['semaphore']
-        async with semaphore:
+        limiter = self.global_data['limiter']
+        wait_started = time.monotonic()
+        async with limiter:
+            LIMITER_WAIT.observe(time.monotonic() - wait_started)
+            task_started = time.monotonic()
             async with OPDbManager(build_db_path(self.db_name), OPBaseModel) as db_manager:
                 proxy = data['proxy']
                 client = data['client']
-                client.define_new_provider(RpcProviders.OPTIMISM.value)
+                client.define_new_provider(RpcProviders.OPTIMISM)
                 session = get_session('https://testnet.monad.xyz',
                 proxy.session_proxy,
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36")
                 task = Task(session=session, client=client, db_manager=db_manager)
+                task.limiter = limiter
+                job = self.Router().route(task=task, action=self.action)
+                task.journal = await AccountJournal(db_manager, self.run_id, client.address, job.__name__).load()
+                if task.journal.is_done('completed'):
+                    task.logger.info('Account already completed this action in this run. Skipping...')
+                    return
                 await sleep(*CONFIG.SETTINGS.SLEEP_BETWEEN_WALLETS)
-                await self.Router().route(task=task, action=self.action)()
-                client.define_new_provider(RpcProviders.OPTIMISM.value)
+                await job()
+                client.define_new_provider(RpcProviders.OPTIMISM)
                 mon_balance = client.w3.from_wei(await client.w3.eth.get_balance(client.address), 'ether')
+                limiter.on_success()
+            TASK_DURATION.observe(time.monotonic() - task_started)
 
     async def handle_db(self):
         if self.db_name == 'new':
+            accounts = self.read_accounts()
+            if not accounts:
+                raise ValueError('There are no accounts to import')
             new_db = get_new_db_path_name()
             async with OPDbManager(new_db, OPBaseModel) as db_manager:
                 await db_manager.create_tables()
-                async with db_manager.session.begin():
-                    try:
-                        for curr in range(len(self.prepared_data['clients'])):
-                                data = {key: value[curr] for key, value in self.prepared_data.items()}
-                                pk = data['clients'].key
-                                proxy = data['proxies'].proxy
-                                await db_manager.create_base_note(pk, proxy)
-                    except Exception:
-                        os.remove(new_db)
-                        raise
+                try:
+                    await db_manager.bulk_create_base_notes(accounts)
+                except Exception:
+                    os.remove(new_db)
+                    raise
             self.db_name = new_db
-        async with OPDbManager(build_db_path(self.db_name), OPBaseModel) as db_manager:
+        async with self.get_db_manager() as db_manager:
+            await db_manager.create_tables()
             await db_manager.add_extra_columns()
-            return await db_manager.get_run_data()
+            await db_manager.migrate_journal()
+            self.run_id = await db_manager.get_last_run_id() if getattr(CONFIG.SETTINGS, 'RESUME', False) else None
+            if self.run_id:
+                logger.info(f'Resuming run {self.run_id}')
+            else:
+                self.run_id = new_run_id()
+                logger.info(f'Starting run {self.run_id}')
+
+    def get_db_manager(self):
+        return OPDbManager(build_db_path(self.db_name), OPBaseModel)
+
+    def get_task_window(self):
+        return self.global_data['limiter'].ceiling
+
+    async def initialize(self):
+        await super().initialize()
+        textfile = getattr(CONFIG.SETTINGS, 'METRICS_TEXTFILE', None)
+        await metrics.start(port=getattr(CONFIG.SETTINGS, 'METRICS_PORT', 0),
+                            textfile=build_logs_path(textfile) if textfile else None)
 
     def get_global_data(self):
         global_data = super().get_global_data()
-        semaphore = asyncio.Semaphore(CONFIG.SETTINGS.SIMULTANEOUS_ACCOUNTS_IN_WORK)
-        global_data.update({"semaphore": semaphore})
+        settings = CONFIG.SETTINGS
+        limiter = AdaptiveLimiter(settings.SIMULTANEOUS_ACCOUNTS_IN_WORK,
+                                  floor=getattr(settings, 'MIN_ACCOUNTS_IN_WORK', 1),
+                                  ceiling=getattr(settings, 'MAX_ACCOUNTS_IN_WORK', settings.SIMULTANEOUS_ACCOUNTS_IN_WORK))
+        provider_pool.add_listener(limiter.on_rpc)
+        global_data.update({"limiter": limiter})
         return global_data
 
-    async def prepare_db_run(self):
-        await self.initialize()
-        self.prepared_data = self.prepare_data()
-        tasks = []
-        try:
-            data_list = await self.handle_db()
-            random.shuffle(data_list)
-        except Exception as e:
-            logger.error(f'Error while handling database: {e}\n[{traceback.format_exc()}]')
-            return
-        logger.info(f'Running {len(data_list)} accounts...')
-        for data in data_list:
-            tasks.append(asyncio.create_task(self.run_task_with_retry(data)))
-        results, _ = await asyncio.wait(tasks)
-        await self.after_run(results)
\ No newline at end of file
+    def get_min_balance(self):
+        if self.action == 'Withdraw from OKX (by unwinned)':
+            return 0
+        return Web3.to_wei(getattr(CONFIG.SETTINGS, 'PREFLIGHT_MIN_BALANCE', 0), 'ether')
+
+    async def save_preflight(self, report):
+        async with OPDbManager(build_db_path(self.db_name), OPBaseModel) as db_manager:
+            await db_manager.save_preflight(report)
+
+    async def close(self):
+        if self.global_data:
+            provider_pool.remove_listener(self.global_data['limiter'].on_rpc)
+        await close_shared_exchange()
@@ -10,6 +10,7 @@ from .cex_config import Config, get_config
 from .cex_withdraw import CexWithdraw
 import random
 from .dapps.bridge import UnichainBridge
+from database.journal import DONE
 from .dapps.swap import Uniswap
 import traceback
 from curl_cffi.requests.errors import RequestsError
@@ -23,6 +24,8 @@ class Task(Logger):
         self.db_manager = db_manager
         super().__init__(self.client.address, additional={'pk': self.client.key})
         self.explorer = None
+        self.journal = None
+        self.limiter = None
 
     @property
     async def balance(self):
@@ -37,13 +40,16 @@ class Task(Logger):
             config=cex_config,
             session=self.session,
             client=self.client,
-            db_manager=self.db_manager
+            db_manager=self.db_manager,
+            journal=self.journal,
+            limiter=self.limiter
         )
 
         try:
             async with cex_withdraw_task:
                 success = await cex_withdraw_task.withdraw()
                 if success:
+                    await self.journal.mark('completed', DONE)
                     self.logger.success("Withdrawal from OKX completed successfully!")
                 else:
                     self.logger.error("Withdrawal from OKX failed.")
@@ -60,6 +66,9 @@ class Task(Logger):
         if CONFIG.FLOW.RANDOM:
             random.shuffle(tasks)
         for task in tasks:
+            if self.journal.is_done(task):
+                self.logger.info(f"Task {task} is already done in this run. Skipping...")
+                continue
             try:
                 task_cls = TASKS_MAP[task](session=self.session,
                                            client=self.client,
@@ -67,6 +76,7 @@ class Task(Logger):
                                            db_manager=self.db_manager)
                 self.logger.info(f"Starting task {task}...")
                 await task_cls.run()
+                await self.journal.mark(task, DONE)
             except (RequestsError, ClientResponseError):
                 raise
             except Exception as e:
@@ -75,12 +85,16 @@ class Task(Logger):
             sleep_time = random.randint(*CONFIG.SETTINGS.SLEEP_BETWEEN_TASKS)
             self.logger.info(f"Sleeping {sleep_time} seconds before next task...")
             await sleep(sleep_time)
+        if all(self.journal.is_done(task) for task in tasks):
+            await self.journal.mark('completed', DONE)
             
     async def unichainbridge(self):
         bridge = UnichainBridge(
             session=self.session,
             client=self.client,
             logger=self.logger,
-            db_manager=self.db_manager
+            db_manager=self.db_manager,
+            journal=self.journal
         )
-        await bridge.run()
\ No newline at end of file
+        if await bridge.run():
+            await self.journal.mark('completed', DONE)
\ No newline at end of file
@@ -1,8 +1,9 @@
 from utils.utils import sleep, build_db_path
 from utils.models import TxStatusResponse
+from utils.metrics import TX_PHASE, TX_RESULTS, PROXY_FAILURES
 from curl_cffi.requests.errors import RequestsError
 import traceback
-from web3.exceptions import TransactionNotFound
+from web3.exceptions import TransactionNotFound, TimeExhausted
 from .database.engine import OPDbManager
 from .database.models import OPBaseModel
 from prettytable import PrettyTable
@@ -20,14 +21,16 @@ def pass_transaction(success_message='Transaction passed',
                     if not completed:
                         tx_hash = await func(obj, *args,  **kwargs)
                         completed = True
-                    await sleep(7, 10)
-                    receipts = await obj.client.w3.eth.get_transaction_receipt(tx_hash)
+                    with TX_PHASE.time(flow=func.__name__, phase='confirm'):
+                        receipts = await obj.client.wait_for_receipt(tx_hash)
                     status = receipts.get("status")
                     if status == 1:
+                        TX_RESULTS.inc(flow=func.__name__, status='success')
                         logger.success(f'{success_message}. HASH - {obj.explorer}{tx_hash}')
                         await sleep()
                         return TxStatusResponse.GOOD, tx_hash
                     else:
+                        TX_RESULTS.inc(flow=func.__name__, status='reverted')
                         logger.error(f'Status {status}. Trying again...')
                         completed = False
                         await sleep(15, 40)
@@ -40,10 +43,11 @@ def pass_transaction(success_message='Transaction passed',
                         return TxStatusResponse.STATUS_ZERO, None
                     message = str(e)
                     if 'Proxy Authentication Required' in message:
+                        PROXY_FAILURES.inc(reason='auth')
                         raise RequestsError('Proxy Authentication Required')
                     elif '' == message:
                         raise RequestsError('Strange error!')
-                    elif isinstance(e, TransactionNotFound):
+                    elif isinstance(e, (TransactionNotFound, TimeExhausted)):
                         logger.info("Transaction not found. Trying again...")
                         await sleep(15, 40)
                         attempts -= 1
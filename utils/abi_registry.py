@@ -0,0 +1,49 @@
+import json
+import os
+
+
+class AbiRegistry:
+    def __init__(self):
+        self._paths = {}
+        self._abis = {}
+        self._trimmed = {}
+        self._contracts = {}
+
+    def register(self, name: str, path):
+        self._paths[name] = os.fspath(path)
+
+    def register_paths(self, namespace: dict):
+        for name, value in namespace.items():
+            if name.endswith('_ABI') and isinstance(value, (str, os.PathLike)):
+                self.register(name, value)
+
+    def resolve(self, abi) -> str:
+        return self._paths.get(abi) or os.fspath(abi)
+
+    def get(self, abi, functions=None) -> list:
+        path = self.resolve(abi)
+        if path not in self._abis:
+            with open(path, 'r') as file:
+                self._abis[path] = json.load(file)
+        if not functions:
+            return self._abis[path]
+        key = (path, frozenset(functions))
+        if key not in self._trimmed:
+            self._trimmed[key] = [entry for entry in self._abis[path]
+                                  if entry.get('type') == 'function' and entry.get('name') in key[1]]
+        return self._trimmed[key]
+
+    def contract(self, w3, address: str, abi, functions=None):
+        contracts = self._contracts.setdefault(w3, {})
+        address = w3.to_checksum_address(address)
+        key = (address, self.resolve(abi), frozenset(functions) if functions else None)
+        if key not in contracts:
+            contracts[key] = w3.eth.contract(address=address, abi=self.get(abi, functions))
+        return contracts[key]
+
+    def forget(self, w3):
+        """Drops contracts bound to a Web3 that is no longer used, they keep the Web3 alive otherwise"""
+        self._contracts.pop(w3, None)
+
+
+abi_registry = AbiRegistry()
@@ -0,0 +1,107 @@
+import asyncio
+
+from loguru import logger
+from web3 import Web3
+
+from .chain_state import chain_states
+from .providers import provider_pool
+
+
+class BlockScanner:
+    def __init__(self, chain: str, poll_interval: float = 2, max_backfill: int = 600, backfill_concurrency: int = 4):
+        self.chain = chain
+        self.poll_interval = poll_interval
+        self.max_backfill = max_backfill
+        self.backfill_concurrency = backfill_concurrency
+        self._watched = {}
+        self._next_block = None
+        self._task = None
+        self._backfills = set()
+
+    @property
+    def w3(self):
+        # own proxy-less Web3, full blocks for every watched address never go through one account's proxy
+        return provider_pool.get_web3(self.chain)
+
+    def watch(self, address: str, from_block: int | None = None, min_value: int = 1) -> asyncio.Future:
+        address = Web3.to_checksum_address(address)
+        if address in self._watched:
+            return self._watched[address][0]
+        future = asyncio.get_running_loop().create_future()
+        self._watched[address] = (future, from_block or 0, min_value)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if from_block is not None:
+            backfill = asyncio.create_task(self._backfill(address, from_block))
+            self._backfills.add(backfill)
+            backfill.add_done_callback(self._backfills.discard)
+        return future
+
+    def unwatch(self, address: str):
+        watched = self._watched.pop(Web3.to_checksum_address(address), None)
+        if watched and not watched[0].done():
+            watched[0].cancel()
+
+    async def _run(self):
+        while self._watched:
+            try:
+                latest = (await chain_states.get(self.chain).refresh()).block_number
+                if self._next_block is None:
+                    self._next_block = latest
+                while self._watched and self._next_block <= latest:
+                    block = await self.w3.eth.get_block(self._next_block, full_transactions=True)
+                    self._match(block)
+                    self._next_block += 1
+            except Exception as e:
+                logger.warning(f'{self.chain} | Block scan failed at block {self._next_block}: {type(e).__name__}: {e}')
+            await asyncio.sleep(self.poll_interval)
+        self._next_block = None
+
+    async def _backfill(self, address: str, from_block: int):
+        """Scans the blocks a watch starts from that the live cursor has already passed, on its own task so
+        an old from_block of a resumed withdrawal never holds back the live scan of other addresses"""
+        while address in self._watched and self._next_block is None:
+            await asyncio.sleep(self.poll_interval)
+        end = self._next_block
+        if address not in self._watched or end is None or from_block >= end:
+            return
+        start = max(from_block, end - self.max_backfill)
+        if start > from_block:
+            logger.info(f'{self.chain} | {address} | Backfilling only the last {self.max_backfill} blocks '
+                        f'of {end - from_block} missed, older deposits are detected by balance')
+        semaphore = asyncio.Semaphore(self.backfill_concurrency)
+
+        async def scan(number):
+            async with semaphore:
+                if address in self._watched:
+                    self._match(await self.w3.eth.get_block(number, full_transactions=True))
+
+        try:
+            await asyncio.gather(*(scan(number) for number in range(start, end)))
+        except Exception as e:
+            logger.warning(f'{self.chain} | {address} | Backfill of blocks {start}-{end} failed: '
+                           f'{type(e).__name__}: {e}')
+
+    def _match(self, block):
+        for tx in block['transactions']:
+            watched = self._watched.get(tx['to']) if tx['to'] else None
+            if watched is None:
+                continue
+            future, from_block, min_value = watched
+            if block['number'] >= from_block and tx['value'] >= min_value:
+                del self._watched[tx['to']]
+                if not future.done():
+                    future.set_result(tx['hash'].hex())
+
+
+class BlockScanners:
+    def __init__(self):
+        self._scanners = {}
+
+    def get(self, chain: str) -> BlockScanner:
+        if chain not in self._scanners:
+            self._scanners[chain] = BlockScanner(chain)
+        return self._scanners[chain]
+
+
+block_scanners = BlockScanners()
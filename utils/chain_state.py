@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+from .providers import provider_pool
+
+
+class ChainState:
+    def __init__(self, chain: str, ttl: float = 2):
+        self.chain = chain
+        self.ttl = ttl
+        self.chain_id = None
+        self.block_number = None
+        self.base_fee = None
+        self.gas_price = None
+        self.updated_at = 0
+        self._refreshing = None
+
+    @property
+    def w3(self):
+        # shared state is refreshed through a proxy-less Web3, one account's dead proxy must not fail it for all
+        return provider_pool.get_web3(self.chain)
+
+    @property
+    def is_fresh(self):
+        return time.monotonic() - self.updated_at < self.ttl
+
+    async def get_chain_id(self) -> int:
+        if self.chain_id is None:
+            self.chain_id = await self.w3.eth.chain_id
+        return self.chain_id
+
+    async def refresh(self, force=False) -> 'ChainState':
+        if self.is_fresh and not force:
+            return self
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh())
+            self._refreshing.add_done_callback(self._clear_refreshing)
+        await asyncio.shield(self._refreshing)
+        return self
+
+    def _clear_refreshing(self, _):
+        self._refreshing = None
+
+    async def _refresh(self):
+        w3 = self.w3
+        block, gas_price = await asyncio.gather(w3.eth.get_block('latest'), w3.eth.gas_price)
+        self.block_number = block['number']
+        self.base_fee = block.get('baseFeePerGas')
+        self.gas_price = gas_price
+        self.updated_at = time.monotonic()
+
+
+class ChainStateService:
+    def __init__(self, ttl: float = 2):
+        self.ttl = ttl
+        self._states = {}
+
+    def get(self, chain: str) -> ChainState:
+        if chain not in self._states:
+            self._states[chain] = ChainState(chain, self.ttl)
+        return self._states[chain]
+
+
+chain_states = ChainStateService()
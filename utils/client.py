@@ -1,20 +1,29 @@
 import asyncio
+from contextlib import contextmanager
 
 import pyuseragents
 from eth_account import Account
 from eth_account.messages import encode_defunct, SignableMessage
-from web3 import Web3
-from web3.eth import AsyncEth
 import subprocess
 from .paths import SEED_TO_ADDRESS_JS, SIGN_MESSAGE_BIP322_JS
+from .providers import provider_pool
+from .nonce import NonceManager
+from .chain_state import chain_states
+from .receipts import receipt_watchers
+from .signer import signer
+from .models import RpcProviders, Proxy
+from .key_ops import address_from_key
 import json
 
 
+Account.enable_unaudited_hdwallet_features()
+
+
 class Client:
-    def __init__(self,  key: str, http_provider: str = 'https://binance.llamarpc.com', proxy=None):
+    def __init__(self,  key: str, chain: str | RpcProviders = RpcProviders.BSC, proxy=None, address=None):
         self.w3 = None
         self.key = key
-        self.address = self.get_address_from_private()
+        self.address = address or self.get_address_from_private()
         self.headers = {
             'accept': '*/*',
             'accept-language': 'en-US,en;q=0.9',
@@ -22,25 +31,45 @@ class Client:
             'user-agent': pyuseragents.random()
         }
         self.proxy = proxy
-        self.http_provider = http_provider
+        self.chain = None
         self.chain_id = None
-        Account.enable_unaudited_hdwallet_features()
-        self.define_new_provider(self.http_provider)
+        self.nonce_manager = NonceManager(self)
+        self.define_new_provider(chain)
 
-    def define_new_provider(self, http_provider: str, chain_id=None):
+    def define_new_provider(self, chain: str | RpcProviders, chain_id=None):
+        chain = chain.name if isinstance(chain, RpcProviders) else chain
         self.chain_id = chain_id
-        self.w3 = Web3(Web3.AsyncHTTPProvider(http_provider,
-                                              request_kwargs={'proxy': self.proxy,
-                                                              'headers': self.headers,
-                                                              'ssl': False}),
-                       modules={'eth': (AsyncEth,)}, middlewares=[])
-        self.http_provider = http_provider
+        previous, self.w3 = self.w3, provider_pool.acquire_web3(chain, self.proxy, self.headers)
+        if previous is not None:
+            provider_pool.release_web3(previous)
+        self.chain = chain
 
     def reconnect_with_new_proxy(self, proxy: str):
         self.headers.update({'user-agent': pyuseragents.random()})
         self.proxy = proxy
-        self.define_new_provider(self.http_provider)
+        self.define_new_provider(self.chain, self.chain_id)
+
+    @property
+    def chain_state(self):
+        return chain_states.get(self.chain)
+
+    async def get_chain_id(self):
+        return self.chain_id or await self.chain_state.get_chain_id()
+
+    async def get_gas_price(self):
+        return (await self.chain_state.refresh()).gas_price
 
+    async def get_base_fee(self):
+        return (await self.chain_state.refresh()).base_fee
+
+    async def get_block_number(self):
+        return (await self.chain_state.refresh()).block_number
+
+    async def wait_for_receipt(self, tx_hash, timeout=120):
+        return await receipt_watchers.get(self.chain).wait(tx_hash, timeout)
+
+    async def sign_transaction(self, transaction: dict) -> bytes:
+        return await signer.sign(transaction, self.key)
 
     def sign(self, encoded_msg: SignableMessage):
         return self.w3.eth.account.sign_message(encoded_msg, self.key)
@@ -49,12 +78,47 @@ class Client:
         return self.sign(encode_defunct(text=msg)).signature.hex()
 
     def get_address_from_private(self):
-        return Account.from_key(self.key).address
+        return address_from_key(self.key)
+
+    def close(self):
+        """Releases the pooled Web3, its provider and contracts are dropped once no client uses them"""
+        if self.w3 is not None:
+            provider_pool.release_web3(self.w3)
+            self.w3 = None
 
     def __repr__(self):
         return f'Client <{self.address}>'
 
 
+class AccountRecord:
+    """Idle account state, a Client with its Web3 binding exists only while the account is active"""
+    __slots__ = ('address', 'key', 'proxy', 'chain', 'client')
+
+    def __init__(self, key: str, address: str, proxy: str | None = None, chain: str = RpcProviders.BSC.name):
+        self.key = key
+        self.address = address
+        self.proxy = proxy
+        self.chain = chain
+        self.client = None
+
+    @classmethod
+    def from_row(cls, row: dict, chain: str = RpcProviders.BSC.name):
+        return cls(row['private_key'], row['address'], row['proxy'], chain)
+
+    @contextmanager
+    def active(self):
+        self.client = Client(self.key, self.chain, Proxy(self.proxy).w3_proxy, address=self.address)
+        try:
+            yield self.client
+        finally:
+            self.chain = self.client.chain
+            self.client.close()
+            self.client = None
+
+    def __repr__(self):
+        return f'AccountRecord <{self.address}>'
+
+
 class BTCClient:
     def __init__(self, seed):
         self.wif = None
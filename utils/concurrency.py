@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from aiohttp import ClientResponseError, ClientProxyConnectionError
+from loguru import logger
+
+
+def is_overload_error(error: Exception) -> bool:
+    if isinstance(error, ClientResponseError):
+        return error.status in (407, 429, 503)
+    return isinstance(error, (asyncio.TimeoutError, ClientProxyConnectionError))
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: +1 per window of healthy completed tasks, multiplicative cut on overload"""
+
+    def __init__(self, initial: int, floor: int = 1, ceiling: int | None = None, latency_target: float = 3.0,
+                 decrease_factor: float = 0.7, cooldown: float = 15):
+        self.floor = max(floor, 1)
+        self.ceiling = max(ceiling or initial, self.floor)
+        self._limit = min(max(initial, self.floor), self.ceiling)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.latency = None
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0
+        self._waiters = deque()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def _set_limit(self, limit: int):
+        limit = min(max(limit, self.floor), self.ceiling)
+        if limit != self._limit:
+            logger.info(f'Accounts in work limit changed: {self._limit} -> {limit}')
+            self._limit = limit
+            self._wake()
+
+    def _wake(self):
+        free = self._limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def acquire(self):
+        while self.in_flight >= self._limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    # woken but cancelled before taking the slot, hand it to the next waiter
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def released(self):
+        """Gives a held slot back while its holder only waits (e.g. for funds on-chain) and takes it again after"""
+        self.release()
+        try:
+            yield
+        finally:
+            try:
+                await self.acquire()
+            except asyncio.CancelledError:
+                # the holder still releases on exit, keep in_flight balanced
+                self.in_flight += 1
+                raise
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def record_latency(self, elapsed: float):
+        self.latency = elapsed if self.latency is None else 0.9 * self.latency + 0.1 * elapsed
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes < self._limit:
+            return
+        self._successes = 0
+        healthy = self.latency is None or self.latency <= self.latency_target
+        if healthy and time.monotonic() - self._last_decrease > self.cooldown:
+            self._set_limit(self._limit + 1)
+
+    def on_failure(self):
+        now = time.monotonic()
+        if now - self._last_decrease > self.cooldown:
+            self._last_decrease = now
+            self._successes = 0
+            self._set_limit(int(self._limit * self.decrease_factor))
+
+    def on_rpc(self, chain, endpoint, methods, elapsed, error):
+        if error is None:
+            self.record_latency(elapsed)
+        elif is_overload_error(error):
+            self.on_failure()
@@ -0,0 +1,143 @@
+"""Bulk key operations: address derivation and wallet generation fanned out over a process pool.
+
+    python -m utils.key_ops generate 100000 --out run_optisoft/data/sids.txt
+    python -m utils.key_ops import run_optisoft/data/sids.txt --db run_optisoft/data/database/op-main.db
+"""
+import argparse
+import asyncio
+import importlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from eth_account import Account
+
+
+@lru_cache(maxsize=65536)
+def address_from_key(key: str) -> str:
+    """secp256k1 derivation is costly and the same keys are derived over and over during a run"""
+    return Account.from_key(key).address
+
+
+def derive_chunk(keys: list[str]) -> list[tuple[str, str]]:
+    return [(key, Account.from_key(key).address) for key in keys]
+
+
+def generate_chunk(count: int) -> list[tuple[str, str]]:
+    accounts = [Account.create() for _ in range(count)]
+    return [(account.key.hex(), account.address) for account in accounts]
+
+
+def chunked(items, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def run_chunks(func, payloads, workers: int | None = None):
+    """Maps func over payloads in worker processes and yields results in order, at most 2 chunks per worker in flight"""
+    workers = workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for payload in payloads:
+            pending.append(loop.run_in_executor(executor, func, payload))
+            if len(pending) >= workers * 2:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+
+
+async def derive_addresses(keys, chunk_size: int = 2000, workers: int | None = None):
+    """Yields chunks of (key, address)"""
+    async for chunk in run_chunks(derive_chunk, chunked(keys, chunk_size), workers):
+        yield chunk
+
+
+async def generate_wallets(count: int, chunk_size: int = 2000, workers: int | None = None):
+    """Yields chunks of freshly generated (key, address)"""
+    sizes = [min(chunk_size, count - start) for start in range(0, count, chunk_size)]
+    async for chunk in run_chunks(generate_chunk, sizes, workers):
+        yield chunk
+
+
+async def import_keys(db_manager, keys, proxies=(), chunk_size: int = 2000, workers: int | None = None) -> int:
+    """Derives addresses for keys in worker processes and streams them into the account DB"""
+    keys = list(keys)
+    proxies = list(proxies) + [None] * (len(keys) - len(proxies))
+
+    async def rows():
+        offset = 0
+        async for chunk in derive_addresses(keys, chunk_size, workers):
+            yield [(key, address, proxy) for (key, address), proxy in zip(chunk, proxies[offset:offset + len(chunk)])]
+            offset += len(chunk)
+
+    return await db_manager.insert_base_notes(rows(), total=len(keys))
+
+
+async def generate_into_db(db_manager, count: int, out_path: str | None = None, chunk_size: int = 2000,
+                           workers: int | None = None) -> int:
+    """Generates wallets in worker processes and streams them into the account DB and optionally a keys file"""
+    out = open(out_path, 'a') if out_path else None
+
+    async def rows():
+        async for chunk in generate_wallets(count, chunk_size, workers):
+            if out:
+                out.writelines(f'{key}\n' for key, _ in chunk)
+            yield [(key, address, None) for key, address in chunk]
+
+    try:
+        return await db_manager.insert_base_notes(rows(), total=count)
+    finally:
+        if out:
+            out.close()
+
+
+def load_model(path: str):
+    module, name = path.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+async def main():
+    from database.engine import DbManager, dispose_engines
+    from .utils import get_data_lines
+
+    parser = argparse.ArgumentParser(prog='python -m utils.key_ops')
+    parser.add_argument('--model', default='run_optisoft.database.models:OPBaseModel')
+    parser.add_argument('--workers', type=int, default=None)
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help='generate N wallets')
+    generate.add_argument('count', type=int)
+    generate.add_argument('--out', help='append generated keys to this file')
+    generate.add_argument('--db', help='database to import generated wallets into')
+    import_file = commands.add_parser('import', help='import a file of private keys')
+    import_file.add_argument('path')
+    import_file.add_argument('--db', required=True)
+    import_file.add_argument('--proxies', help='file of proxies, matched to keys line by line')
+    args = parser.parse_args()
+
+    if args.command == 'generate' and not args.db:
+        with open(args.out or 'wallets.txt', 'a') as out:
+            async for chunk in generate_wallets(args.count, workers=args.workers):
+                out.writelines(f'{key}\n' for key, _ in chunk)
+        return
+    try:
+        async with DbManager(args.db, load_model(args.model)) as db_manager:
+            await db_manager.create_tables()
+            if args.command == 'generate':
+                await generate_into_db(db_manager, args.count, args.out, workers=args.workers)
+            else:
+                proxies = list(get_data_lines(args.proxies)) if args.proxies else ()
+                await import_keys(db_manager, get_data_lines(args.path), proxies, workers=args.workers)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from aiohttp import web
+from loguru import logger
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(labelnames, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield f'{self.name}{_format_labels(self.labelnames, key)} {value}'
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        if key not in self._values:
+            self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts, _ = state = self._values[key]
+        counts[bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def samples(self):
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, (('le', bound),))
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class MetricsRegistry:
+    """In-process metrics exported in the Prometheus text format over HTTP and/or as a textfile"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._runner = None
+        self._writer_task = None
+        self.textfile = None
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(self.render())
+        os.replace(tmp_path, path)
+
+    def on_rpc(self, chain, endpoint, methods, elapsed, error):
+        status = 'ok' if error is None else type(error).__name__
+        # a batch is recorded per call, so batching does not hide the real method names
+        for method in methods:
+            RPC_REQUESTS.inc(chain=chain, endpoint=endpoint, method=method, status=status)
+            RPC_LATENCY.observe(elapsed, chain=chain, endpoint=endpoint, method=method)
+
+    async def _handle(self, request):
+        return web.Response(text=self.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    async def _write_forever(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.write_textfile(self.textfile)
+            except OSError as e:
+                logger.warning(f'Failed to write metrics textfile: {e}')
+
+    async def start(self, port: int | None = None, host: str = '127.0.0.1', textfile: str | None = None,
+                    interval: float = 15):
+        if port and self._runner is None:
+            app = web.Application()
+            app.router.add_get('/metrics', self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, host, port).start()
+            logger.info(f'Metrics are served on http://{host}:{port}/metrics')
+        if textfile and self._writer_task is None:
+            self.textfile = textfile
+            self._writer_task = asyncio.create_task(self._write_forever(interval))
+
+    async def stop(self):
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+        if self.textfile:
+            self.write_textfile(self.textfile)
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+metrics = MetricsRegistry()
+
+RPC_REQUESTS = metrics.counter('rpc_requests_total', 'JSON-RPC requests', ('chain', 'endpoint', 'method', 'status'))
+RPC_LATENCY = metrics.histogram('rpc_request_seconds', 'JSON-RPC request latency',
+                                ('chain', 'endpoint', 'method'))
+TX_PHASE = metrics.histogram('tx_phase_seconds', 'Transaction build/sign/send/confirm latency', ('flow', 'phase'))
+TX_RESULTS = metrics.counter('tx_total', 'Finished transactions', ('flow', 'status'))
+PROXY_FAILURES = metrics.counter('proxy_failures_total', 'Proxy failures', ('reason',))
+LIMITER_WAIT = metrics.histogram('accounts_limiter_wait_seconds', 'Time accounts wait for a concurrency slot')
+TASK_DURATION = metrics.histogram('task_seconds', 'Duration of completed account tasks')
@@ -3,6 +3,8 @@ from enum import Enum
 
 
 class Proxy:
+    __slots__ = ('proxy',)
+
     def __init__(self, proxy: str | None):
         self.proxy = proxy
         self.validate()
@@ -23,9 +25,6 @@ class Proxy:
         if self.proxy:
             return f'http://{self.proxy}'
 
-    def __getattr__(self, item):
-        return self.__dict__[item] if self.__dict__['proxy'] else None
-
     def validate(self):
         if self.proxy:
             pattern = r'^.+:.+@.+:\d+$'
@@ -37,11 +36,20 @@ class Proxy:
 
 
 class RpcProviders(Enum):
-    BSC = 'https://rpc.ankr.com/bsc/a27491f5239db00f57a99fbf3ff085e564d763a789cec167f635c3202c29ad7a'
-    OPTIMISM = "https://1rpc.io/op"
-    UNICHAIN = "https://unichain.drpc.org"
-    ARBITRUM = "https://rpc.ankr.com/arbitrum"
-    BASE = "https://rpc.ankr.com/base"
+    BSC = (('https://rpc.ankr.com/bsc/a27491f5239db00f57a99fbf3ff085e564d763a789cec167f635c3202c29ad7a', 2),
+           'https://binance.llamarpc.com',
+           'https://bsc-dataseed.bnbchain.org')
+    OPTIMISM = (("https://1rpc.io/op", 2),
+                "https://mainnet.optimism.io",
+                "https://optimism.lava.build")
+    UNICHAIN = (("https://unichain.drpc.org", 2),
+                "https://mainnet.unichain.org")
+    ARBITRUM = (("https://rpc.ankr.com/arbitrum", 2),
+                "https://arb1.arbitrum.io/rpc",
+                "https://arb1.lava.build")
+    BASE = (("https://rpc.ankr.com/base", 2),
+            "https://mainnet.base.org",
+            "https://base.lava.build")
 
 
 class ChainExplorers(Enum):
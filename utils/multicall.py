@@ -0,0 +1,71 @@
+import asyncio
+
+from eth_abi import encode, decode
+from web3 import Web3
+
+
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+
+AGGREGATE3_SELECTOR = bytes.fromhex('82ad56cb')
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex('4d2301cc')
+BALANCE_OF_SELECTOR = bytes.fromhex('70a08231')
+ALLOWANCE_SELECTOR = bytes.fromhex('dd62ed3e')
+DECIMALS_SELECTOR = bytes.fromhex('313ce567')
+
+
+class Multicall:
+    def __init__(self, w3, address=MULTICALL3_ADDRESS, batch_size=500, concurrency=4):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(address)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+
+    async def aggregate(self, calls: list[tuple[str, bytes, str]]) -> list:
+        """Run (target, call_data, output_type) calls through aggregate3, None for failed calls"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_batch(batch):
+            async with semaphore:
+                return await self._aggregate_batch(batch)
+
+        batches = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        results = await asyncio.gather(*(run_batch(batch) for batch in batches))
+        return [result for batch_results in results for result in batch_results]
+
+    async def _aggregate_batch(self, batch):
+        call_data = AGGREGATE3_SELECTOR + encode(['(address,bool,bytes)[]'],
+                                                 [[(target, True, data) for target, data, _ in batch]])
+        raw = await self.w3.eth.call({'to': self.address, 'data': call_data})
+        (results,) = decode(['(bool,bytes)[]'], bytes(raw))
+        decoded = []
+        for (success, return_data), (_, _, output_type) in zip(results, batch):
+            if not success or len(return_data) < 32:
+                decoded.append(None)
+                continue
+            decoded.append(decode([output_type], return_data)[0])
+        return decoded
+
+    async def read(self, accounts, tokens=(), spenders=(), native=True, decimals=False) -> dict:
+        accounts = [Web3.to_checksum_address(account) for account in accounts]
+        tokens = [Web3.to_checksum_address(token) for token in tokens]
+        spenders = [Web3.to_checksum_address(spender) for spender in spenders]
+        keys, calls = [], []
+        if native:
+            for account in accounts:
+                keys.append(('native', account))
+                calls.append((self.address, GET_ETH_BALANCE_SELECTOR + encode(['address'], [account]), 'uint256'))
+        for token in tokens:
+            if decimals:
+                keys.append(('decimals', token))
+                calls.append((token, DECIMALS_SELECTOR, 'uint8'))
+            for account in accounts:
+                keys.append(('balances', (account, token)))
+                calls.append((token, BALANCE_OF_SELECTOR + encode(['address'], [account]), 'uint256'))
+                for spender in spenders:
+                    keys.append(('allowances', (account, token, spender)))
+                    calls.append((token, ALLOWANCE_SELECTOR + encode(['address', 'address'], [account, spender]),
+                                  'uint256'))
+        snapshot = {'native': {}, 'balances': {}, 'allowances': {}, 'decimals': {}}
+        for (section, key), value in zip(keys, await self.aggregate(calls)):
+            snapshot[section][key] = value
+        return snapshot
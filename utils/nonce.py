@@ -0,0 +1,60 @@
+import asyncio
+from bisect import insort
+from contextlib import asynccontextmanager
+
+
+NONCE_ERRORS = ('nonce too low', 'already known', 'nonce too high', 'invalid nonce',
+                'replacement transaction underpriced')
+
+
+def is_nonce_error(exception: Exception) -> bool:
+    message = str(exception).lower()
+    return any(error in message for error in NONCE_ERRORS)
+
+
+class NonceManager:
+    def __init__(self, client):
+        self.client = client
+        self._next = {}
+        self._released = {}
+        self._locks = {}
+
+    @property
+    def _key(self):
+        return self.client.chain
+
+    async def acquire(self) -> int:
+        key = self._key
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            released = self._released.get(key)
+            if released:
+                return released.pop(0)
+            if key not in self._next:
+                self._next[key] = await self.client.w3.eth.get_transaction_count(self.client.address, 'pending')
+            nonce = self._next[key]
+            self._next[key] += 1
+            return nonce
+
+    def release(self, nonce: int):
+        key = self._key
+        if self._next.get(key) == nonce + 1:
+            self._next[key] = nonce
+        elif key in self._next:
+            insort(self._released.setdefault(key, []), nonce)
+
+    def reset(self):
+        key = self._key
+        self._next.pop(key, None)
+        self._released.pop(key, None)
+
+    @asynccontextmanager
+    async def reserve(self):
+        nonce = await self.acquire()
+        try:
+            yield nonce
+        except Exception as e:
+            if is_nonce_error(e):
+                self.reset()
+            else:
+                self.release(nonce)
+            raise
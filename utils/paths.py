@@ -1,6 +1,7 @@
 import os
 
 from utils.run_config import ROOT_DIR
+from utils.abi_registry import abi_registry
 
 
 SEED_TO_ADDRESS_JS = os.path.join(ROOT_DIR, 'utils', 'js', 'seed_to_address.mjs')
@@ -10,3 +11,5 @@ APPROVE_ABI = os.path.join(ROOT_DIR, 'utils', 'abis', 'approve_abi.json')
 BALANCE_OF_ABI = os.path.join(ROOT_DIR, 'utils', 'abis', 'balance_of_abi.json')
 DECIMALS_ABI = os.path.join(ROOT_DIR, 'utils', 'abis', 'decimals_abi.json')
 ERC20_ABI = os.path.join(ROOT_DIR, 'utils', 'abis', 'erc20_abi.json')
+
+abi_registry.register_paths(globals())
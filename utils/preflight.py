@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections import Counter
+
+from aiohttp import ClientSession, ClientTimeout
+from loguru import logger
+
+from .multicall import Multicall
+from .providers import provider_pool
+from .rpc_pool import rpc_pools
+
+
+class ProxyCheck:
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.connect_time = None
+        self.egress_ip = None
+        self.rpc_ok = False
+        self.error = None
+
+    @property
+    def ok(self):
+        # the egress lookup only feeds the shared-ip warning, a proxy that reaches the RPC is usable
+        return self.rpc_ok
+
+    @property
+    def status(self):
+        if self.ok:
+            return 'ok'
+        return 'no_rpc' if self.egress_ip else 'dead'
+
+    def __repr__(self):
+        return f'ProxyCheck <{self.proxy}: {self.status}>'
+
+
+class Preflight:
+    """Checks proxies and funds of all accounts concurrently before any task takes a slot"""
+
+    def __init__(self, chain: str, concurrency: int = 50, timeout: float = 10,
+                 ip_url: str = 'https://api.ipify.org?format=json', max_failed_share: float = 0.9,
+                 min_checks: int = 5):
+        self.chain = chain
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ip_url = ip_url
+        self.max_failed_share = max_failed_share
+        self.min_checks = min_checks
+
+    async def check_egress(self, session: ClientSession, check: ProxyCheck):
+        try:
+            async with session.get(self.ip_url, proxy=f'http://{check.proxy}') as response:
+                response.raise_for_status()
+                check.egress_ip = (await response.json(content_type=None)).get('ip')
+        except Exception as e:
+            logger.debug(f'Egress lookup through {check.proxy} failed: {type(e).__name__}: {e}')
+
+    async def check_rpc(self, session: ClientSession, check: ProxyCheck):
+        start = time.monotonic()
+        endpoint = rpc_pools.get(self.chain).select()
+        try:
+            async with session.post(endpoint.url, proxy=f'http://{check.proxy}',
+                                    json={'jsonrpc': '2.0', 'method': 'eth_blockNumber', 'params': [], 'id': 1}
+                                    ) as response:
+                response.raise_for_status()
+                check.rpc_ok = 'result' in await response.json(content_type=None)
+            check.connect_time = time.monotonic() - start
+        except Exception as e:
+            check.error = f'{type(e).__name__}: {e}'
+
+    async def check_proxy(self, session: ClientSession, proxy: str) -> ProxyCheck:
+        check = ProxyCheck(proxy)
+        await asyncio.gather(self.check_egress(session, check), self.check_rpc(session, check))
+        return check
+
+    async def check_proxies(self, proxies) -> dict[str, ProxyCheck]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(session, proxy):
+            async with semaphore:
+                return await self.check_proxy(session, proxy)
+
+        unique = {proxy for proxy in proxies if proxy}
+        async with ClientSession(timeout=ClientTimeout(total=self.timeout)) as session:
+            checks = await asyncio.gather(*(bounded(session, proxy) for proxy in unique))
+        shared_ips = Counter(check.egress_ip for check in checks if check.egress_ip)
+        for ip, count in shared_ips.items():
+            if count > 1:
+                logger.warning(f'{count} proxies share the same egress ip {ip}')
+        return {check.proxy: check for check in checks}
+
+    async def fetch_balances(self, addresses) -> dict[str, int]:
+        snapshot = await Multicall(provider_pool.get_web3(self.chain)).read(addresses, native=True)
+        return snapshot['native']
+
+    async def run(self, proxies, addresses) -> tuple[dict[str, ProxyCheck], dict[str, int]]:
+        checks, balances = await asyncio.gather(self.check_proxies(proxies), self.fetch_balances(addresses))
+        dead = sum(not check.ok for check in checks.values())
+        logger.info(f'Preflight: {len(checks) - dead}/{len(checks)} proxies alive, '
+                    f'{sum(1 for balance in balances.values() if balance)}/{len(balances)} accounts funded')
+        if len(checks) >= self.min_checks and dead >= len(checks) * self.max_failed_share:
+            # nearly every proxy failing points at the checker or the RPC, not at the proxies
+            logger.warning(f'Preflight: {dead}/{len(checks)} proxy checks failed, keeping proxies as they are')
+            return {}, balances
+        return checks, balances
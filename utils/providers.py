@@ -0,0 +1,262 @@
+import asyncio
+import time
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, ClientResponseError, ClientHttpProxyError
+from loguru import logger
+from web3 import Web3, AsyncHTTPProvider
+from web3.eth import AsyncEth
+from web3._utils.encoding import FriendlyJsonSerde, Web3JsonEncoder
+
+from .rpc_pool import rpc_pools, EndpointPool, READ_METHODS
+from .abi_registry import abi_registry
+
+
+class PooledHTTPProvider(AsyncHTTPProvider):
+    def __init__(self, endpoints: EndpointPool, pool: 'ProviderPool', request_kwargs: dict | None = None,
+                 batch_window=0.0, max_batch_size=1):
+        super().__init__(endpoints.endpoints[0].url, request_kwargs=request_kwargs)
+        if not self._request_kwargs.get('headers'):
+            # requests are posted as raw bytes, without a Content-Type json endpoints answer 415
+            self._request_kwargs['headers'] = self.get_request_headers()
+        self.endpoints = endpoints
+        self.pool = pool
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.batch_supported = True
+        self._queue = []
+        self._flush_handle = None
+        self._batches = set()
+
+    def _is_endpoint_error(self, error: BaseException) -> bool:
+        """Proxy, connect and timeout failures of a proxied request say nothing about the endpoint"""
+        if isinstance(error, ClientHttpProxyError):
+            return False
+        if isinstance(error, ClientResponseError):
+            return error.status != 407
+        return not self._request_kwargs.get('proxy')
+
+    async def _post_to(self, endpoint, request_data: bytes, methods: tuple):
+        session = self.pool.get_session()
+        start = time.monotonic()
+        try:
+            async with session.post(endpoint.url, data=request_data, **self._request_kwargs) as response:
+                raw_response = await response.read()
+                if response.status >= 400:
+                    # keep the body, it is the only way to tell "batch unsupported" from other rejections
+                    raise ClientResponseError(response.request_info, response.history, status=response.status,
+                                              message=raw_response[:200].decode(errors='replace') or response.reason,
+                                              headers=response.headers)
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            if self._is_endpoint_error(e):
+                self.endpoints.record(endpoint, elapsed, False)
+            self.pool.notify(self.endpoints.chain, endpoint.url, methods, elapsed, e)
+            raise
+        elapsed = time.monotonic() - start
+        self.endpoints.record(endpoint, elapsed, True)
+        self.pool.notify(self.endpoints.chain, endpoint.url, methods, elapsed, None)
+        return self.decode_rpc_response(raw_response)
+
+    async def _post(self, request_data: bytes, methods: tuple, read_only=False):
+        self.endpoints.start_probing(self.pool.get_session)
+        endpoint = self.endpoints.select()
+        if not read_only or len(self.endpoints) < 2:
+            return await self._post_to(endpoint, request_data, methods)
+        # Hedged read: if the first endpoint is slow or fails, race a second one
+        primary = asyncio.ensure_future(self._post_to(endpoint, request_data, methods))
+        done, _ = await asyncio.wait({primary}, timeout=self.endpoints.hedge_delay)
+        if done and primary.exception() is None:
+            return primary.result()
+        if done and not self._is_endpoint_error(primary.exception()):
+            # another endpoint would fail the same way through this proxy
+            raise primary.exception()
+        pending = {primary} if not done else set()
+        backup_endpoint = self.endpoints.select(exclude=(endpoint,))
+        pending.add(asyncio.ensure_future(self._post_to(backup_endpoint, request_data, methods)))
+        error = primary.exception() if done else None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for task_left in pending:
+                        task_left.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def _make_single_request(self, method, params):
+        return await self._post(self.encode_rpc_request(method, params), (method,), read_only=method in READ_METHODS)
+
+    async def make_request(self, method, params):
+        if not self.batch_supported or self.max_batch_size <= 1:
+            return await self._make_single_request(method, params)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((method, params, future))
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        queue, self._queue = self._queue, []
+        if queue:
+            batch = asyncio.ensure_future(self._send_batch(queue))
+            self._batches.add(batch)
+            batch.add_done_callback(self._batches.discard)
+
+    async def _send_batch(self, queue):
+        if len(queue) == 1:
+            await self._send_single(*queue[0])
+            return
+        requests = [{'jsonrpc': '2.0', 'method': method, 'params': params or [], 'id': next(self.request_counter)}
+                    for method, params, _ in queue]
+        try:
+            responses = await self._post(FriendlyJsonSerde().json_encode(requests, Web3JsonEncoder).encode(),
+                                         tuple(method for method, _, _ in queue),
+                                         read_only=all(method in READ_METHODS for method, _, _ in queue))
+        except ClientResponseError as e:
+            # Throttling and proxy auth go back to the callers for the limiter and proxy retry to handle
+            if e.status in (407, 429) or e.status >= 500 or 'batch' not in (e.message or '').lower():
+                self._fail(queue, e)
+                return
+            responses = None
+        except Exception as e:
+            self._fail(queue, e)
+            return
+        if not isinstance(responses, list):
+            error = responses.get('error') if isinstance(responses, dict) else None
+            if error is not None and 'batch' not in str(error).lower():
+                # one error object for the whole batch (e.g. a rate limit), every call gets it as its response
+                for request, (_, _, future) in zip(requests, queue):
+                    if not future.done():
+                        future.set_result({'jsonrpc': '2.0', 'id': request['id'], 'error': error})
+                return
+            self.batch_supported = False
+            await asyncio.gather(*(self._send_single(*item) for item in queue))
+            return
+        responses = {response.get('id'): response for response in responses if isinstance(response, dict)}
+        for request, (method, params, future) in zip(requests, queue):
+            response = responses.get(request['id'])
+            if response is None:
+                await self._send_single(method, params, future)
+            elif not future.done():
+                future.set_result(response)
+
+    async def _send_single(self, method, params, future):
+        try:
+            response = await self._make_single_request(method, params)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(response)
+
+    @staticmethod
+    def _fail(queue, exception):
+        for _, _, future in queue:
+            if not future.done():
+                future.set_exception(exception)
+
+
+class ProviderPool:
+    def __init__(self, limit_per_host=20, keepalive_timeout=60, dns_cache_ttl=300, timeout=30,
+                 batch_window=0.005, max_batch_size=20):
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = timeout
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._session = None
+        self._web3s = {}
+        self._keys = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def notify(self, chain: str, endpoint: str, methods: tuple, elapsed: float, error: Exception | None):
+        """Called once per HTTP request, methods holds every JSON-RPC call it carried"""
+        for listener in self._listeners:
+            try:
+                listener(chain, endpoint, methods, elapsed, error)
+            except Exception as e:
+                logger.warning(f'RPC listener {getattr(listener, "__qualname__", listener)} failed: {type(e).__name__}: {e}')
+
+    def get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(limit=0,
+                                     limit_per_host=self.limit_per_host,
+                                     keepalive_timeout=self.keepalive_timeout,
+                                     ttl_dns_cache=self.dns_cache_ttl,
+                                     use_dns_cache=True,
+                                     ssl=False)
+            self._session = ClientSession(connector=connector, timeout=ClientTimeout(total=self.timeout))
+        return self._session
+
+    def _get_entry(self, chain: str, proxy: str | None, headers: dict | None) -> dict:
+        key = (chain, proxy)
+        entry = self._web3s.get(key)
+        if entry is None:
+            provider = PooledHTTPProvider(rpc_pools.get(chain), self,
+                                          request_kwargs={'proxy': proxy, 'headers': headers},
+                                          batch_window=self.batch_window,
+                                          max_batch_size=self.max_batch_size)
+            w3 = Web3(provider, modules={'eth': (AsyncEth,)}, middlewares=[])
+            entry = self._web3s[key] = {'w3': w3, 'refs': 0, 'pinned': False}
+            self._keys[id(w3)] = key
+        return entry
+
+    def get_web3(self, chain: str, proxy: str | None = None, headers: dict | None = None) -> Web3:
+        """Web3 for run-wide services, kept until the pool is closed"""
+        entry = self._get_entry(chain, proxy, headers)
+        entry['pinned'] = True
+        return entry['w3']
+
+    def acquire_web3(self, chain: str, proxy: str | None = None, headers: dict | None = None) -> Web3:
+        """Web3 of an active account, every acquire_web3 must be paired with release_web3"""
+        entry = self._get_entry(chain, proxy, headers)
+        entry['refs'] += 1
+        return entry['w3']
+
+    def release_web3(self, w3: Web3):
+        key = self._keys.get(id(w3))
+        entry = self._web3s.get(key)
+        if entry is None or entry['w3'] is not w3:
+            return
+        entry['refs'] -= 1
+        if entry['refs'] <= 0 and not entry['pinned']:
+            del self._web3s[key]
+            del self._keys[id(w3)]
+            abi_registry.forget(w3)
+
+    async def warmup(self, keys, concurrency=20):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def touch(chain, proxy):
+            async with semaphore:
+                w3 = self.acquire_web3(chain, proxy)
+                try:
+                    await w3.eth.chain_id
+                finally:
+                    self.release_web3(w3)
+
+        await asyncio.gather(*(touch(chain, proxy) for chain, proxy in set(keys)), return_exceptions=True)
+
+    async def close(self):
+        rpc_pools.stop()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+provider_pool = ProviderPool()
@@ -0,0 +1,141 @@
+import json
+import os
+import time
+
+from aiohttp import ClientTimeout
+
+from .providers import provider_pool
+
+
+class ProxyStats:
+    def __init__(self, proxy: str, latency=None, successes=0, failures=0):
+        self.proxy = proxy
+        self.latency = latency
+        self.successes = successes
+        self.failures = failures
+        self.consecutive_failures = 0
+        self.cooldown_until = 0
+        self.leases = 0
+
+    @property
+    def score(self):
+        reliability = (self.successes + 1) / (self.successes + self.failures + 2)
+        return reliability / (self.latency or 1.0)
+
+    @property
+    def cooling(self):
+        return time.monotonic() < self.cooldown_until
+
+    @property
+    def suspect(self):
+        return self.consecutive_failures > 0
+
+    def to_dict(self):
+        return {'latency': self.latency, 'successes': self.successes, 'failures': self.failures}
+
+
+class ProxyPool:
+    def __init__(self, proxies, max_leases: int = 1, cooldown: float = 120, scores_path: str | None = None,
+                 test_url: str = 'https://api.ipify.org?format=json', test_timeout: float = 10):
+        self.max_leases = max_leases
+        self.cooldown = cooldown
+        self.scores_path = scores_path
+        self.test_url = test_url
+        self.test_timeout = test_timeout
+        self.stats = {}
+        self._leases = {}
+        self.add(proxies)
+        self.load()
+
+    def __len__(self):
+        return len(self.stats)
+
+    def add(self, proxies):
+        for proxy in proxies:
+            if proxy and proxy not in self.stats:
+                self.stats[proxy] = ProxyStats(proxy)
+
+    def load(self):
+        if not self.scores_path or not os.path.exists(self.scores_path):
+            return
+        try:
+            with open(self.scores_path, 'r') as file:
+                scores = json.load(file)
+        except (OSError, ValueError):
+            return
+        for proxy, score in scores.items():
+            if proxy in self.stats:
+                self.stats[proxy] = ProxyStats(proxy, **score)
+
+    def save(self):
+        if not self.scores_path:
+            return
+        with open(self.scores_path, 'w') as file:
+            json.dump({proxy: stats.to_dict() for proxy, stats in self.stats.items()}, file)
+
+    def report_success(self, proxy: str, latency: float | None = None):
+        stats = self.stats.get(proxy)
+        if stats is None:
+            return
+        stats.successes += 1
+        stats.consecutive_failures = 0
+        if latency is not None:
+            stats.latency = latency if stats.latency is None else 0.7 * stats.latency + 0.3 * latency
+
+    def report_failure(self, proxy: str):
+        stats = self.stats.get(proxy)
+        if stats is None:
+            return
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        stats.cooldown_until = time.monotonic() + self.cooldown * 2 ** min(stats.consecutive_failures - 1, 4)
+
+    async def test(self, proxy: str) -> bool:
+        start = time.monotonic()
+        try:
+            async with provider_pool.get_session().get(self.test_url, proxy=f'http://{proxy}', ssl=False,
+                                                       timeout=ClientTimeout(total=self.test_timeout)) as response:
+                response.raise_for_status()
+        except Exception:
+            self.report_failure(proxy)
+            return False
+        self.report_success(proxy, time.monotonic() - start)
+        return True
+
+    def _reserve(self, account: str, tried: set) -> ProxyStats | None:
+        candidates = [stats for stats in self.stats.values()
+                      if stats.leases < self.max_leases and not stats.cooling and stats.proxy not in tried]
+        if not candidates:
+            return None
+        stats = max(candidates, key=lambda item: item.score)
+        tried.add(stats.proxy)
+        stats.leases += 1
+        self._leases[account] = stats.proxy
+        return stats
+
+    async def checkout(self, account: str) -> str | None:
+        tried = set()
+        while True:
+            # picking and leasing never awaits, so no checkout waits on another one's proxy test
+            self._release(account)
+            stats = self._reserve(account, tried)
+            if stats is None:
+                return None
+            # proxies coming back from a cooldown are re-tested before they are handed out
+            if not stats.suspect or await self.test(stats.proxy):
+                return stats.proxy
+
+    def _release(self, account: str):
+        proxy = self._leases.pop(account, None)
+        if proxy is not None:
+            self.stats[proxy].leases -= 1
+        return proxy
+
+    def checkin(self, account: str, ok: bool = True):
+        proxy = self._release(account)
+        if proxy is None:
+            return
+        if ok:
+            self.report_success(proxy)
+        else:
+            self.report_failure(proxy)
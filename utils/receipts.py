@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from loguru import logger
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from .chain_state import chain_states
+from .providers import provider_pool
+
+
+class ReceiptWatcher:
+    def __init__(self, chain: str, block_time: float = 2, min_interval: float = 0.5, max_interval: float = 12):
+        self.chain = chain
+        self.block_time = block_time
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._pending = {}
+        self._waiters = {}
+        self._task = None
+        self._last_block = None
+        self._last_block_at = None
+
+    @property
+    def w3(self):
+        # own proxy-less Web3, so receipts of every account never go through one account's proxy
+        return provider_pool.get_web3(self.chain)
+
+    @property
+    def poll_interval(self):
+        return min(max(self.block_time, self.min_interval), self.max_interval)
+
+    @staticmethod
+    def _normalize(tx_hash) -> str:
+        tx_hash = tx_hash if isinstance(tx_hash, str) else tx_hash.hex()
+        return (tx_hash if tx_hash.startswith('0x') else f'0x{tx_hash}').lower()
+
+    async def wait(self, tx_hash, timeout: float = 120):
+        tx_hash = self._normalize(tx_hash)
+        future = self._pending.get(tx_hash)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tx_hash] = future
+        self._waiters[tx_hash] = self._waiters.get(tx_hash, 0) + 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeExhausted(f"Transaction {tx_hash} is not in the chain after {timeout} seconds")
+        finally:
+            # the future is shared, drop it only when its last waiter is gone
+            self._waiters[tx_hash] -= 1
+            if not self._waiters[tx_hash]:
+                del self._waiters[tx_hash]
+                if self._pending.get(tx_hash) is future:
+                    del self._pending[tx_hash]
+
+    def _observe_block(self, block_number):
+        now = time.monotonic()
+        if self._last_block is not None and block_number > self._last_block:
+            observed = (now - self._last_block_at) / (block_number - self._last_block)
+            self.block_time = 0.8 * self.block_time + 0.2 * observed
+        self._last_block = block_number
+        self._last_block_at = now
+
+    async def _run(self):
+        while self._pending:
+            try:
+                state = await chain_states.get(self.chain).refresh()
+                if state.block_number != self._last_block:
+                    self._observe_block(state.block_number)
+                    await self._check_pending()
+            except Exception as e:
+                logger.warning(f'{self.chain} | Receipt polling failed: {type(e).__name__}: {e}')
+            await asyncio.sleep(self.poll_interval)
+
+    async def _check_pending(self):
+        hashes = list(self._pending)
+        w3 = self.w3
+        receipts = await asyncio.gather(*(w3.eth.get_transaction_receipt(tx_hash) for tx_hash in hashes),
+                                        return_exceptions=True)
+        errors = [receipt for receipt in receipts
+                  if isinstance(receipt, Exception) and not isinstance(receipt, TransactionNotFound)]
+        if errors:
+            logger.warning(f'{self.chain} | {len(errors)}/{len(hashes)} receipt requests failed: '
+                           f'{type(errors[0]).__name__}: {errors[0]}')
+        for tx_hash, receipt in zip(hashes, receipts):
+            if isinstance(receipt, BaseException) or receipt is None:
+                continue
+            future = self._pending.pop(tx_hash, None)
+            if future is not None and not future.done():
+                future.set_result(receipt)
+
+
+class ReceiptWatchers:
+    def __init__(self):
+        self._watchers = {}
+
+    def get(self, chain: str) -> ReceiptWatcher:
+        if chain not in self._watchers:
+            self._watchers[chain] = ReceiptWatcher(chain)
+        return self._watchers[chain]
+
+
+receipt_watchers = ReceiptWatchers()
@@ -0,0 +1,154 @@
+import asyncio
+import random
+import time
+
+from loguru import logger
+
+from .models import RpcProviders
+
+
+READ_METHODS = {
+    'eth_blockNumber', 'eth_call', 'eth_chainId', 'eth_estimateGas', 'eth_feeHistory', 'eth_gasPrice',
+    'eth_getBalance', 'eth_getBlockByHash', 'eth_getBlockByNumber', 'eth_getCode', 'eth_getLogs',
+    'eth_getTransactionByHash', 'eth_getTransactionCount', 'eth_getTransactionReceipt',
+    'eth_maxPriorityFeePerGas', 'net_version',
+}
+
+
+class Endpoint:
+    def __init__(self, url: str, weight: float = 1):
+        self.url = url
+        self.weight = weight
+        self.latency = None
+        self.error_rate = 0.0
+        self.head = None
+        self.ejected_until = 0
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.ejected_until
+
+    @property
+    def score(self):
+        return self.weight / ((self.latency or 0.5) * (1 + 10 * self.error_rate))
+
+    def record(self, elapsed: float, ok: bool):
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        self.error_rate = 0.9 * self.error_rate + (0 if ok else 0.1)
+
+    def __repr__(self):
+        return f'Endpoint <{self.url}>'
+
+
+class EndpointPool:
+    def __init__(self, chain: str, urls, max_error_rate=0.3, max_head_lag=5, eject_for=60,
+                 probe_interval=15, hedge_delay=0.4):
+        self.chain = chain
+        self.endpoints = []
+        self.max_error_rate = max_error_rate
+        self.max_head_lag = max_head_lag
+        self.eject_for = eject_for
+        self.probe_interval = probe_interval
+        self.hedge_delay = hedge_delay
+        self._probe_task = None
+        self.add(urls)
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def add(self, urls):
+        known = {endpoint.url for endpoint in self.endpoints}
+        for url in urls:
+            url, weight = (url, 1) if isinstance(url, str) else url
+            if url not in known:
+                self.endpoints.append(Endpoint(url, weight))
+                known.add(url)
+
+    def select(self, exclude=()) -> Endpoint:
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.healthy and endpoint not in exclude]
+        if not candidates:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude] or self.endpoints
+        return random.choices(candidates, weights=[endpoint.score for endpoint in candidates])[0]
+
+    def eject(self, endpoint: Endpoint):
+        endpoint.ejected_until = time.monotonic() + self.eject_for
+
+    def record(self, endpoint: Endpoint, elapsed: float, ok: bool):
+        endpoint.record(elapsed, ok)
+        if not ok and endpoint.error_rate > self.max_error_rate:
+            self.eject(endpoint)
+
+    async def _probe_endpoint(self, session, endpoint: Endpoint):
+        start = time.monotonic()
+        try:
+            async with session.post(endpoint.url, json={'jsonrpc': '2.0', 'method': 'eth_blockNumber',
+                                                        'params': [], 'id': 1}) as response:
+                response.raise_for_status()
+                endpoint.head = int((await response.json(content_type=None))['result'], 16)
+        except Exception:
+            self.record(endpoint, time.monotonic() - start, False)
+            return
+        self.record(endpoint, time.monotonic() - start, True)
+
+    async def probe(self, session):
+        await asyncio.gather(*(self._probe_endpoint(session, endpoint) for endpoint in self.endpoints))
+        heads = [endpoint.head for endpoint in self.endpoints if endpoint.head is not None]
+        if not heads:
+            return
+        best_head = max(heads)
+        for endpoint in self.endpoints:
+            if endpoint.head is not None and best_head - endpoint.head > self.max_head_lag:
+                self.eject(endpoint)
+            elif not endpoint.healthy and endpoint.error_rate <= self.max_error_rate:
+                endpoint.ejected_until = 0
+
+    async def _probe_forever(self, get_session):
+        while True:
+            try:
+                await self.probe(get_session())
+            except Exception as e:
+                logger.warning(f'{self.chain} | RPC endpoints health probe failed: {type(e).__name__}: {e}')
+            await asyncio.sleep(self.probe_interval)
+
+    def start_probing(self, get_session):
+        if len(self.endpoints) < 2 or (self._probe_task and not self._probe_task.done()):
+            return
+        try:
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_forever(get_session))
+        except RuntimeError:
+            pass
+
+    def stop_probing(self):
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
+
+
+class RpcPools:
+    def __init__(self):
+        self._pools = {}
+
+    def get(self, chain: str) -> EndpointPool:
+        if chain not in self._pools:
+            if chain in RpcProviders.__members__:
+                urls = RpcProviders[chain].value
+            elif chain.startswith('http'):
+                urls = [chain]
+            else:
+                raise ValueError(f'Unknown chain: {chain}')
+            self._pools[chain] = EndpointPool(chain, urls)
+        return self._pools[chain]
+
+    def register(self, chain: str, urls):
+        if chain in self._pools or chain in RpcProviders.__members__:
+            self.get(chain).add(urls)
+        else:
+            self._pools[chain] = EndpointPool(chain, urls)
+        return self._pools[chain]
+
+    def stop(self):
+        for pool in self._pools.values():
+            pool.stop_probing()
+
+
+rpc_pools = RpcPools()
@@ -5,10 +5,15 @@ from .run_config import current_run, ROOT_DIR
 import os
 from loguru import logger
 from .utils import get_data_lines, sleep, MaxLenException, Logger
-from .models import Proxy
-from .client import Client
+from .models import Proxy, RpcProviders
+from .client import Client, AccountRecord
+from .providers import provider_pool
+from .proxy_pool import ProxyPool
+from .preflight import Preflight
+from .metrics import metrics, PROXY_FAILURES
+from database.engine import dispose_engines
+from .signer import signer
 from abc import ABC, abstractmethod
-import random
 import traceback
 from aiohttp.client_exceptions import ClientResponseError
 
@@ -119,7 +124,14 @@ class TwitterRunner(MainRunner):
         pass 
 
 
-class ModernRunner:
+class ModernRunner(ABC):
+    PROXY_MAX_ACCOUNTS = 1
+    CHAIN = RpcProviders.BSC.name
+    PREFLIGHT_CHAIN = None
+    TASK_WINDOW = 50
+    ACCOUNTS_PAGE_SIZE = 500
+    SHUFFLE_ACCOUNTS = False
+
     def __init__(self):
         self.action, self.db_name = self.get_action()
         self.prepared_data = None
@@ -127,8 +139,9 @@ class ModernRunner:
 
     async def initialize(self):
         self.global_data = self.get_global_data()
+        provider_pool.add_listener(metrics.on_rpc)
 
-    def prepare_data(self):
+    def read_accounts(self):
         project_proxies = os.path.join(ROOT_DIR, current_run.PACKAGE, 'data', 'proxies.txt')
         project_sids = os.path.join(ROOT_DIR, current_run.PACKAGE, 'data', 'sids.txt')
         proxies = list(get_data_lines(project_proxies))
@@ -139,11 +152,18 @@ class ModernRunner:
         elif not sids:
             logger.error('No data to run!')
             return
+        for proxy in proxies:
+            Proxy(proxy)
+        return list(zip(sids, self.justify_data(sids, proxies)))
+
+    def prepare_data(self):
+        accounts = self.read_accounts()
+        if not accounts:
+            return
 
         prepared_proxies = []
         prepared_clients = []
-        proxies = self.justify_data(sids, proxies)
-        for sid, raw_proxy in zip(sids, proxies):
+        for sid, raw_proxy in accounts:
             proxy = Proxy(raw_proxy)
             client = Client(sid, proxy=proxy.w3_proxy)
             prepared_proxies.append(proxy)
@@ -174,62 +194,170 @@ class ModernRunner:
 
     async def prepare_db_run(self):
         await self.initialize()
-        self.prepared_data = self.prepare_data()
-        if not self.prepared_data:
-            return
-        tasks = []
         try:
-            data_list = await self.handle_db()
+            await self.handle_db()
         except Exception as e:
             logger.error(f'Error while handling database: {e}\n[{traceback.format_exc()}]')
             return
-        logger.info(f'Running {len(data_list)} accounts...')
-        for data in data_list:
-            tasks.append(asyncio.create_task(self.run_task_with_retry(data)))
-        results, _ = await asyncio.wait(tasks)
+        results = await self.run_accounts(self.iter_accounts())
         await self.after_run(results)
 
+    @abstractmethod
+    def get_db_manager(self):
+        pass
+
+    async def iter_accounts(self):
+        """Streams account rows from the DB page by page, every page goes through preflight first"""
+        async with self.get_db_manager() as db_manager:
+            async for page in db_manager.iter_accounts(self.ACCOUNTS_PAGE_SIZE, shuffle=self.SHUFFLE_ACCOUNTS):
+                for account in await self.safe_preflight([AccountRecord.from_row(row, self.CHAIN) for row in page]):
+                    yield account
+
+    def get_task_window(self):
+        return self.TASK_WINDOW
+
+    async def run_accounts(self, accounts):
+        """Creates account tasks through a window, so Clients exist only for accounts that are about to run"""
+        window = asyncio.Semaphore(self.get_task_window())
+        tasks = []
+        async for account in accounts:
+            await window.acquire()
+            task = asyncio.create_task(self.run_account(account))
+            task.add_done_callback(lambda _: window.release())
+            tasks.append(task)
+        if not tasks:
+            logger.error('No accounts to run!')
+            return set()
+        results, _ = await asyncio.wait(tasks)
+        logger.info(f'Finished {len(results)} accounts')
+        return results
+
+    async def run_account(self, account: AccountRecord):
+        try:
+            proxy = Proxy(account.proxy)
+        except ValueError as e:
+            logger.error(f'{account.address} | {e.args[0]}: {account.proxy}. Skipping account')
+            return
+        if not proxy:
+            logger.warning(f"There isn't proxy for this account: {account.address}. Running it without proxy")
+        with account.active() as client:
+            return await self.run_task_with_retry({'client': client, 'proxy': proxy})
+
+    async def safe_preflight(self, accounts):
+        try:
+            return await self.preflight(accounts)
+        except Exception as e:
+            logger.error(f'Preflight failed, running accounts unchecked: {e}\n[{traceback.format_exc()}]')
+            return accounts
+
+    async def preflight(self, accounts):
+        if not self.PREFLIGHT_CHAIN or not accounts:
+            return accounts
+        checks, balances = await Preflight(self.PREFLIGHT_CHAIN).run(
+            [account.proxy for account in accounts], [account.address for account in accounts])
+        proxy_pool = self.global_data['proxy_pool']
+        min_balance = self.get_min_balance()
+        report = {}
+        ready = []
+        for account in accounts:
+            address, proxy = account.address, account.proxy
+            check = checks.get(proxy)
+            balance = balances.get(address)
+            report[account.key] = {'balance': balance, 'proxy': proxy,
+                                   'proxy_status': check.status if check else None}
+            if balance is not None and balance < min_balance:
+                logger.warning(f'{address} | Balance is lower than {min_balance} wei. Skipping account')
+                continue
+            if check and not check.ok:
+                PROXY_FAILURES.inc(reason=check.status)
+                new_proxy = await proxy_pool.checkout(address)
+                if not new_proxy:
+                    logger.warning(f'{address} | Proxy {proxy} is {check.status} ({check.error}) '
+                                   f'and there is no extra proxy available. Skipping account')
+                    continue
+                logger.info(f'{address} | Proxy {proxy} is {check.status}. Switched to {new_proxy}')
+                account.proxy = new_proxy
+                report[account.key].update({'proxy': new_proxy, 'proxy_status': 'replaced'})
+            ready.append(account)
+        await self.save_preflight(report)
+        logger.info(f'{len(ready)}/{len(accounts)} accounts passed preflight')
+        return ready
+
+    def get_min_balance(self):
+        return 0
+
+    async def save_preflight(self, report):
+        pass
+
     async def run_task_with_retry(self, data):
         client = data['client']
         proxy = data['proxy']
         proxy_str = proxy.session_proxy.get('http') if proxy.session_proxy else None
         logger = Logger(client.address, additional={'pk': client.key, 'proxy': proxy_str}).logger
-        extra_proxies = self.global_data['extra_proxies']
-        while True:
-            try:
-                return await self.run_task(data)
-            except MaxLenException:
-                logger.error(f"Task failed with exception: Cloudflare. Retrying...")
-                await sleep(5, 30)
-            except (RequestsError, ClientResponseError) as e:
-                if not extra_proxies:
-                    logger.error('There is no extra proxy available!')
-                    break
-                logger.error(f"Task failed with exception: {type(e)}: {e}. Trying to get extra proxy...")
-                random_proxy_index = random.randint(0, len(extra_proxies) - 1)
-                random_proxy = extra_proxies.pop(random_proxy_index)
-                logger.info(f'GOT PROXY {random_proxy}! Reconnecting...')
-                proxy = Proxy(proxy=random_proxy)
-                data['proxy'] = proxy
-                client.reconnect_with_new_proxy(proxy.w3_proxy)
-            except Exception as e:
-                logger.error(f"Task failed with exception: {type(e)}: {e}|[{traceback.format_exc()}]. Retrying...")
-                await sleep(5, 30)
+        proxy_pool = self.global_data['proxy_pool']
+        try:
+            while True:
+                try:
+                    return await self.run_task(data)
+                except MaxLenException:
+                    logger.error(f"Task failed with exception: Cloudflare. Retrying...")
+                    await sleep(5, 30)
+                except (RequestsError, ClientResponseError) as e:
+                    PROXY_FAILURES.inc(reason=type(e).__name__)
+                    if self.global_data.get('limiter'):
+                        self.global_data['limiter'].on_failure()
+                    logger.error(f"Task failed with exception: {type(e)}: {e}. Trying to get extra proxy...")
+                    proxy_pool.checkin(client.address, ok=False)
+                    new_proxy = await proxy_pool.checkout(client.address)
+                    if not new_proxy:
+                        logger.error('There is no extra proxy available!')
+                        break
+                    logger.info(f'GOT PROXY {new_proxy}! Reconnecting...')
+                    proxy = Proxy(proxy=new_proxy)
+                    data['proxy'] = proxy
+                    client.reconnect_with_new_proxy(proxy.w3_proxy)
+                except Exception as e:
+                    logger.error(f"Task failed with exception: {type(e)}: {e}|[{traceback.format_exc()}]. Retrying...")
+                    await sleep(5, 30)
+        finally:
+            proxy_pool.checkin(client.address)
 
     def get_global_data(self):
-        extra_proxies = list(get_data_lines(os.path.join(ROOT_DIR, current_run.PACKAGE, 'data', 'extra_proxies.txt')))
-        global_data = {'extra_proxies': extra_proxies}
+        data_path = os.path.join(ROOT_DIR, current_run.PACKAGE, 'data')
+        extra_proxies = []
+        for proxies_file in ('extra_proxies.txt', 'proxies_reserve.txt'):
+            if os.path.exists(os.path.join(data_path, proxies_file)):
+                extra_proxies += list(get_data_lines(os.path.join(data_path, proxies_file)))
+        proxy_pool = ProxyPool(extra_proxies,
+                               max_leases=self.PROXY_MAX_ACCOUNTS,
+                               scores_path=os.path.join(data_path, 'proxy_scores.json'))
+        global_data = {'proxy_pool': proxy_pool}
         return global_data
 
     async def run_task(self, data):
         pass 
 
     async def run(self):
-        await self.prepare_db_run() 
+        try:
+            await self.prepare_db_run()
+        finally:
+            if self.global_data:
+                self.global_data['proxy_pool'].save()
+            provider_pool.remove_listener(metrics.on_rpc)
+            await metrics.stop()
+            await self.close()
+            await provider_pool.close()
+            await dispose_engines()
+            signer.close()
+            await logger.complete()
 
     async def after_run(self, results):
         pass
 
+    async def close(self):
+        """Releases run-wide resources of the project, called even if the run fails"""
+        pass
+
     def get_action(self):
         router = self.Router()
         return router.action, router.db
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from eth_account import Account
+
+
+def sign_one(transaction: dict, key: str) -> bytes | Exception:
+    try:
+        return bytes(Account.sign_transaction(transaction, key).rawTransaction)
+    except Exception as e:
+        return e
+
+
+def sign_many(items: list[tuple[dict, str]]) -> list[bytes | Exception]:
+    """Errors are returned in place, so one bad transaction does not fail the rest of its batch"""
+    return [sign_one(transaction, key) for transaction, key in items]
+
+
+class TransactionSigner:
+    """Signs transactions in a worker pool, requests arriving within batch_window are signed as one batch.
+    Low-volume requests (nothing queued or in flight, none signed within inline_interval) are signed inline,
+    for those a pool hop costs more than the signature itself"""
+
+    def __init__(self, use_processes: bool = False, workers: int | None = None, batch_window: float = 0.002,
+                 max_batch_size: int = 64, inline_interval: float = 0.05):
+        self.use_processes = use_processes
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.inline_interval = inline_interval
+        self._last_inline = 0
+        self._executor = None
+        self._queue = []
+        self._flush_handle = None
+        self._in_flight = 0
+        self._batches = set()
+
+    def get_executor(self):
+        if self._executor is None:
+            executor_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = executor_cls(max_workers=self.workers)
+        return self._executor
+
+    @staticmethod
+    def sign_inline(transaction: dict, key: str) -> bytes:
+        raw_transaction = sign_one(transaction, key)
+        if isinstance(raw_transaction, Exception):
+            raise raw_transaction
+        return raw_transaction
+
+    async def sign(self, transaction: dict, key: str) -> bytes:
+        now = time.monotonic()
+        if not self._queue and not self._in_flight and now - self._last_inline > self.inline_interval:
+            self._last_inline = now
+            return self.sign_inline(transaction, key)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((transaction, key, future))
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    async def sign_batch(self, items: list[tuple[dict, str]]) -> list[bytes | Exception]:
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(self.get_executor(), sign_many, items)
+        finally:
+            self._in_flight -= 1
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        queue, self._queue = self._queue, []
+        if queue:
+            batch = asyncio.ensure_future(self._sign_queued(queue))
+            self._batches.add(batch)
+            batch.add_done_callback(self._batches.discard)
+
+    async def _sign_queued(self, queue):
+        try:
+            raw_transactions = await self.sign_batch([(transaction, key) for transaction, key, _ in queue])
+        except Exception as e:
+            for _, _, future in queue:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), raw_transaction in zip(queue, raw_transactions):
+            if future.done():
+                continue
+            if isinstance(raw_transaction, Exception):
+                future.set_exception(raw_transaction)
+            else:
+                future.set_result(raw_transaction)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+signer = TransactionSigner()
@@ -7,7 +7,7 @@ import sys
 from datetime import datetime
 from decimal import Decimal
 from functools import wraps
-from web3.exceptions import TransactionNotFound
+from web3.exceptions import TimeExhausted
 from curl_cffi.requests import AsyncSession
 import pyuseragents
 from typing import Iterator
@@ -25,6 +25,9 @@ from .config import RETRIES
 from .models import TxStatusResponse
 from .paths import USER_AGENTS
 from .paths import APPROVE_ABI, BALANCE_OF_ABI, DECIMALS_ABI, ERC20_ABI
+from .abi_registry import abi_registry
+from .multicall import Multicall
+from .metrics import TX_PHASE, TX_RESULTS, PROXY_FAILURES
 from .run_config import current_run, ROOT_DIR
 from faker import Faker
 
@@ -171,6 +174,52 @@ class MaxLenException(Exception):
     message = 'Cloudflare'
 
 
+def format_record(record):
+    extra = record['extra']
+    if extra.get('func_name'):
+        logger_format = (
+            "<fg #9ACD32>{time:MMM-DD|HH:mm:ss}</fg #9ACD32> - <fg #9ACD32>{extra[func_module]}.{extra[func_name]}</fg #9ACD32> - "
+        )
+    else:
+        logger_format = (
+            "<fg #9ACD32>{time:MMM-DD|HH:mm:ss}</fg #9ACD32> - <fg #9ACD32>{module}.{function}</fg #9ACD32> - "
+        )
+    if extra.get('pk'):
+        logger_format += "<cyan>PK:</cyan> <fg #9370DB>{extra[pk]}</fg #9370DB>"
+    if extra.get('seed'):
+        logger_format += "<cyan>SEED:</cyan> <fg #9370DB>{extra[seed]}</fg #9370DB>"
+    if extra.get('proxy'):
+        logger_format += " | <cyan>PROXY:</cyan> <fg #9370DB>{extra[proxy]}</fg #9370DB>"
+    if extra.get('client_address'):
+        logger_format += " | <cyan>Address:</cyan> <fg #8A2BE2>{extra[client_address]}</fg #8A2BE2>"
+    logger_format += " - <level>{level}"
+    if record["level"].name == "ERROR":
+        logger_format += "<red> - {message}</red></level>\n"
+    else:
+        logger_format += " - {message}</level>\n"
+    return logger_format
+
+
+def setup_logging(level='INFO', json_logs=False):
+    """Configures the global loguru sinks once per process, repeated calls are no-ops"""
+    if setup_logging.configured:
+        return
+    setup_logging.configured = True
+    logger.remove()
+    # enqueue=True hands records to a background thread so sink I/O never blocks the event loop
+    logger.add(sys.stdout, format=format_record, level=level, colorize=True, enqueue=True)
+    log_path = build_logs_path(f"{current_run.PACKAGE}-{time.strftime('%Y-%m-%d')}")
+    if json_logs:
+        logger.add(f'{log_path}.jsonl', format='{message}', serialize=True, level=level,
+                   rotation="500 MB", retention="7 days", enqueue=True)
+    else:
+        logger.add(log_path, format=format_record, level=level,
+                   rotation="500 MB", retention="7 days", enqueue=True)
+
+
+setup_logging.configured = False
+
+
 class Logger:
     def __init__(self, client_address: str, *, additional: dict | None = None):
         additional = {} if additional is None else additional
@@ -180,43 +229,10 @@ class Logger:
         self.client_address = client_address
         values_to_bind = {k: v for k, v in {'client_address': self.client_address,
                                             'pk': f'{self.pk[-6:]}' if self.pk else None,
-                                            'seed': f'"{" ".join(self.seed.split()[-2:])}"' if self.seed else 'None',
-                                            'proxy': self.proxy.split('@')[-1] if self.proxy else 'None'}.items() if v}
+                                            'seed': f'"{" ".join(self.seed.split()[-2:])}"' if self.seed else None,
+                                            'proxy': self.proxy.split('@')[-1] if self.proxy else None}.items() if v}
         self.logger = logger.bind(**values_to_bind)
-        self.logger_settings()
-
-    def logger_settings(self):
-        self.logger.remove()
-        self.logger.add(sys.stdout, format=self.format_record, colorize=True)
-        self.logger.add(build_logs_path(f"{current_run.PACKAGE}-{time.strftime('%Y-%m-%d')}"),
-            format=self.format_record,
-            level="INFO",
-            rotation="500 MB",
-            retention="7 days"
-        )
-
-    def format_record(self, record):
-        if record['extra'].get('func_name'):
-            logger_format = (
-                "<fg #9ACD32>{time:MMM-DD|HH:mm:ss}</fg #9ACD32> - <fg #9ACD32>{extra[func_module]}.{extra[func_name]}</fg #9ACD32> - "
-            )
-        else:
-            logger_format = (
-                "<fg #9ACD32>{time:MMM-DD|HH:mm:ss}</fg #9ACD32> - <fg #9ACD32>{module}.{function}</fg #9ACD32> - "
-            )
-        if self.pk:
-            logger_format += "<cyan>PK:</cyan> <fg #9370DB>{extra[pk]}</fg #9370DB>"
-        if self.seed:
-            logger_format += "<cyan>SEED:</cyan> <fg #9370DB>{extra[seed]}</fg #9370DB>"
-        if self.proxy:
-            logger_format += " | <cyan>PROXY:</cyan> <fg #9370DB>{extra[proxy]}</fg #9370DB>"
-        logger_format += " | <cyan>Address:</cyan> <fg #8A2BE2>{extra[client_address]}</fg #8A2BE2>"
-        logger_format += " - <level>{level}"
-        if record["level"].name == "ERROR":
-            logger_format += "<red> - {message}</red></level>\n"
-        else:
-            logger_format += " - {message}</level>\n"
-        return logger_format
+        setup_logging()
 
 
 async def sleep(a=3, b=None):
@@ -297,8 +313,8 @@ def wait_tx_status(max_wait_time=100,
             while True:
                 try:
                     tx_hash = await func(obj, *args, **kwargs)
-                    await sleep(7, 10)
-                    receipts = await obj.client.w3.eth.get_transaction_receipt(tx_hash)
+                    time_left = max(max_wait_time - (time.time() - start_time), 1)
+                    receipts = await obj.client.wait_for_receipt(tx_hash, timeout=time_left)
                     status = receipts.get("status")
                     if status == 1:
                         obj.logger.success(f'{success_message}. HASH - {explorer}{tx_hash}')
@@ -310,12 +326,9 @@ def wait_tx_status(max_wait_time=100,
                     else:
                         obj.logger.error(f"{error_message}. HASH - {explorer}{tx_hash}")
                         return
-                except TransactionNotFound:
-                    if time.time() - start_time > max_wait_time:
-                        obj.logger.error(f"{error_message}. HASH - {explorer}{tx_hash}")
-                        return
-                    obj.logger.debug('Transaction not found, one more attempt. Sleeping some time...')
-                    await asyncio.sleep(5)
+                except TimeExhausted:
+                    obj.logger.error(f"{error_message}. HASH - {explorer}{tx_hash}")
+                    return
                 except Exception as e:
                     obj.logger.error(f'Unknown error! {e}')
                     return
@@ -381,19 +394,23 @@ def pass_transaction(success_message='Transaction passed'):
                     if not completed:
                         tx_hash = await func(obj, *args, **kwargs)
                         completed = True
-                    await sleep(7, 10)
-                    receipts = await obj.client.w3.eth.get_transaction_receipt(tx_hash)
+                    with TX_PHASE.time(flow=func.__name__, phase='confirm'):
+                        receipts = await obj.client.wait_for_receipt(tx_hash)
                     status = receipts.get("status")
                     if status == 1:
+                        TX_RESULTS.inc(flow=func.__name__, status='success')
                         obj.logger.success(f'{success_message}')
                         await sleep()
                         return TxStatusResponse.GOOD
                     else:
+                        TX_RESULTS.inc(flow=func.__name__, status='reverted')
                         obj.logger.error(f'Status {status}')
                 except TimeoutError:
+                    PROXY_FAILURES.inc(reason='timeout')
                     raise RequestsError("Timeout error!")
                 except Exception as e:
                     if 'proxy authentication required' in str(e).lower():
+                        PROXY_FAILURES.inc(reason='auth')
                         raise RequestsError("Proxy authentication required")
                     obj.logger.error(f'Error! {type(e)}{e}. Trying again...')
                     await sleep(10, 30)
@@ -405,45 +422,57 @@ def pass_transaction(success_message='Transaction passed'):
 @pass_transaction(success_message="Asset successfully approved")
 async def approve_asset(obj, contract, spender, value=None):
     obj.logger.info('Starting approving...')
-    approve_abi = read_json(APPROVE_ABI)
-    contract_address = obj.client.w3.to_checksum_address(contract)
     spender = obj.client.w3.to_checksum_address(spender)
     value = (2 ** 256 - 1) if not value else value
-    contract = await Contract(obj.client).get_contract(
-        contract_address=contract_address,
-        abi=approve_abi)
-    transaction = await contract.functions.approve(spender, value).build_transaction(
-        {
-            'chainId': await obj.client.w3.eth.chain_id,
-            'from': obj.client.address,
-            'nonce': await obj.client.w3.eth.get_transaction_count(obj.client.address),
-            'gasPrice': await obj.client.w3.eth.gas_price
-        })
-    transaction['gas'] = await obj.client.w3.eth.estimate_gas(transaction)
-    signed_txn = obj.client.w3.eth.account.sign_transaction(transaction, private_key=obj.client.key)
-    tx_hash = await obj.client.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    contract = abi_registry.contract(obj.client.w3, contract, APPROVE_ABI)
+    build_started = time.monotonic()
+    chain_id, gas_price = await asyncio.gather(
+        obj.client.get_chain_id(),
+        obj.client.get_gas_price()
+    )
+    async with obj.client.nonce_manager.reserve() as nonce:
+        transaction = await contract.functions.approve(spender, value).build_transaction(
+            {
+                'chainId': chain_id,
+                'from': obj.client.address,
+                'nonce': nonce,
+                'gasPrice': gas_price
+            })
+        TX_PHASE.observe(time.monotonic() - build_started, flow='approve_asset', phase='build')
+        with TX_PHASE.time(flow='approve_asset', phase='sign'):
+            raw_transaction = await obj.client.sign_transaction(transaction)
+        with TX_PHASE.time(flow='approve_asset', phase='send'):
+            tx_hash = await obj.client.w3.eth.send_raw_transaction(raw_transaction)
     return tx_hash.hex()
 
 async def asset_balance(obj, asset='eth'):
     if asset == 'eth':
         return obj.client.w3.from_wei(await obj.client.w3.eth.get_balance(obj.client.address), 'ether')
-    contract = await Contract(obj.client).get_contract(
-        contract_address=obj.client.w3.to_checksum_address(asset),
-        abi=read_json(BALANCE_OF_ABI))
+    contract = abi_registry.contract(obj.client.w3, asset, BALANCE_OF_ABI)
     return await contract.functions.balanceOf(obj.client.address).call()
 
+async def asset_balances(obj, assets):
+    tokens = [asset for asset in assets if asset != 'eth']
+    snapshot = await Multicall(obj.client.w3).read([obj.client.address], tokens, native='eth' in assets)
+    address = obj.client.w3.to_checksum_address(obj.client.address)
+    balances = {}
+    for asset in assets:
+        if asset == 'eth':
+            balances[asset] = snapshot['native'][address]
+        else:
+            balances[asset] = snapshot['balances'][(address, obj.client.w3.to_checksum_address(asset))]
+    failed = [asset for asset, balance in balances.items() if balance is None]
+    if failed:
+        # a failed multicall read is not an empty balance
+        raise ValueError(f'Failed to read balances of {", ".join(failed)}')
+    return balances
+
 async def get_decimals(obj, contract):
-    contract = obj.client.w3.to_checksum_address(contract)
-    contract = await Contract(obj.client).get_contract(
-        contract_address=obj.client.w3.to_checksum_address(contract),
-        abi=read_json(DECIMALS_ABI))
+    contract = abi_registry.contract(obj.client.w3, contract, DECIMALS_ABI)
     return await contract.functions.decimals().call()
 
 async def approve_if_insufficient_allowance(obj, contract_address, spender, value=2**256-1):
-    contract = obj.client.w3.to_checksum_address(spender)
-    contract = await Contract(obj.client).get_contract(
-        contract_address=obj.client.w3.to_checksum_address(contract),
-        abi=read_json(ERC20_ABI))
+    contract = abi_registry.contract(obj.client.w3, spender, ERC20_ABI)
     current_allowance = await contract.functions.allowance(
         obj.client.address,
         obj.client.w3.to_checksum_address(contract_address)
@@ -454,17 +483,16 @@ async def approve_if_insufficient_allowance(obj, contract_address, spender, valu
 
 async def get_tokens_with_any_balance(obj, tokens: dict[str, dict[str, str | int]]):
     tokens_with_balance = []
-    native_balance = await obj.client.w3.eth.get_balance(obj.client.address)
+    assets = ['eth'] + [tokens[token]["address"] for token in tokens if token != 'eth']
+    balances = await asset_balances(obj, assets)
+    native_balance = balances['eth']
     if native_balance > 0:
         native_amount = float(obj.client.w3.from_wei(native_balance, 'ether'))
         tokens_with_balance.append(("eth", native_amount))
 
     for token in tokens:
         if token != 'eth':
-            token_contract = await Contract(obj.client).get_contract(
-                contract_address=obj.client.w3.to_checksum_address(tokens[token]["address"]),
-                abi=read_json(ERC20_ABI))
-            balance = await token_contract.functions.balanceOf(obj.client.address).call()
+            balance = balances[tokens[token]["address"]]
             if balance > 0:
                 decimals = tokens[token]["decimals"]
                 amount = float(Decimal(str(balance)) / Decimal(str(10 ** decimals)))